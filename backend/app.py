@@ -1,14 +1,28 @@
-from flask import Flask, request, jsonify
+import os
+
+# Must be set before torch is imported (by the model loader) so CUDA kernels
+# are loaded on first use instead of all at context creation
+os.environ.setdefault('CUDA_MODULE_LOADING', 'LAZY')
+
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-import os
+import time
 import logging
-from datetime import timedelta
+import threading
+from hashlib import blake2b
+from datetime import datetime, timedelta, timezone
+from cachetools import TTLCache
 from dotenv import load_dotenv
+from extensions import cache, compress, ORJSONProvider
 
 # Load environment variables
 load_dotenv()
 
+# Configure logging before importing modules that log at import time
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s %(message)s')
+logger = logging.getLogger(__name__)
+
 # Import routes
 from routes.auth import auth_bp
 from routes.fields import fields_bp
@@ -16,29 +30,70 @@ from routes.predictions import predictions_bp
 
 # Import database initialization (use SQLite for demo)
 try:
-    from database.sqlite_db import init_db
-    logger = logging.getLogger(__name__)
+    from database.sqlite_db import init_db, release_request_connection
     logger.info("Using SQLite database")
 except ImportError:
     from database.db import init_db
-    logger = logging.getLogger(__name__)
+    release_request_connection = None
     logger.info("Using PostgreSQL database")
-from utils.model_loader import load_model
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 
 # Configuration
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET', 'supersecretjwt')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
+# SimpleCache is per-process; point CACHE_TYPE at a shared backend (e.g. RedisCache)
+# when running several workers so invalidations reach all of them
+app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'SimpleCache')
+app.config['CACHE_DEFAULT_TIMEOUT'] = int(os.getenv('CACHE_DEFAULT_TIMEOUT', '30'))
+if os.getenv('CACHE_REDIS_URL'):
+    app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL')
+# Spectral analysis payloads are large, key-heavy JSON; prefer Brotli and
+# leave small responses uncompressed
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 1024
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
 
 # Initialize extensions
 CORS(app, 
      origins=["http://localhost:3000", "http://127.0.0.1:3000", "http://frontend:3000"], 
      supports_credentials=True,
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     allow_headers=["Content-Type", "Authorization"])
-jwt = JWTManager(app)
+     allow_headers=["Content-Type", "Authorization"],
+     max_age=86400)  # Let browsers reuse preflight results for a day
+cache.init_app(app)
+compress.init_app(app)
+
+# Cache of already-verified tokens, keyed by a hash of the raw token so memory
+# stays bounded. Entries never outlive the token's own exp claim.
+_jwt_cache = TTLCache(maxsize=10_000, ttl=60)
+_jwt_cache_lock = threading.Lock()
+
+class CachingJWTManager(JWTManager):
+    """JWTManager that skips signature verification for recently seen tokens"""
+    
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        
+        key = blake2b(encoded_token.encode(), digest_size=16).digest()
+        now = time.time()
+        with _jwt_cache_lock:
+            cached = _jwt_cache.get(key)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        
+        # Invalid tokens raise here and are never cached
+        decoded = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        expires_at = min(decoded.get('exp', now), now + 3600)
+        with _jwt_cache_lock:
+            _jwt_cache[key] = (decoded, expires_at)
+        return decoded
+
+jwt = CachingJWTManager(app)
 
 # JWT Error Handlers
 @jwt.expired_token_loader
@@ -56,14 +111,22 @@ def missing_token_callback(error_string):
     logger.warning(f"Missing token: {error_string}")
     return jsonify({'error': 'Authorization token required'}), 401
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+@jwt.user_lookup_loader
+def user_lookup_callback(jwt_header, jwt_payload):
+    """Cast the token identity once per request; routes read it from g.user_id"""
+    g.user_id = int(jwt_payload['sub'])
+    return g.user_id
 
 # Request logging middleware
 @app.before_request
 def log_request_info():
-    logger.info(f'{request.method} {request.url} - Headers: {dict(request.headers)}')
+    logger.info('%s %s', request.method, request.url)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('Headers: %s', dict(request.headers))
+
+# Hand the request's shared database connection back to the pool
+if release_request_connection:
+    app.teardown_request(release_request_connection)
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -73,24 +136,36 @@ app.register_blueprint(predictions_bp, url_prefix='/api/predictions')
 # Global model instance
 model = None
 
-def startup():
-    """Initialize database and load model on startup"""
+def _warm_model():
+    """Load the ML model off the startup path so requests can be served meanwhile"""
     global model
     try:
-        # Initialize database
-        init_db()
-        logger.info("Database initialized successfully")
+        # Imported here so the ML stack isn't loaded before the app can serve /api/health
+        from utils.model_loader import load_model, predict_crop_health
         
-        # Load ML model
         model_path = os.getenv('MODEL_PATH', '/app/model/model.pt')
         model = load_model(model_path)
         if model:
             logger.info(f"Model loaded successfully from {model_path}")
+            # One forward pass on default features so the first real request
+            # doesn't pay for lazy kernel loading / JIT warm-up
+            predict_crop_health(use_real_data=False)
         else:
             logger.warning("Model loading failed, using dummy predictions")
-            
+    except Exception as e:
+        logger.error(f"Model loading error: {str(e)}")
+
+def startup():
+    """Initialize database and start loading the model in the background"""
+    try:
+        # Initialize database
+        init_db()
+        logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Startup error: {str(e)}")
+    
+    # Prediction endpoints report the model as unavailable (503) until this finishes
+    threading.Thread(target=_warm_model, name='model-warmup', daemon=True).start()
 
 # Call startup function
 startup()
@@ -101,7 +176,7 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'model_loaded': model is not None,
-        'timestamp': str(os.popen('date').read().strip())
+        'timestamp': datetime.now(timezone.utc).isoformat()
     })
 
 @app.route('/api/status', methods=['GET'])
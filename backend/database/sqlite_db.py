@@ -1,32 +1,184 @@
 import os
+import time
+import queue
+import atexit
+import threading
 import sqlite3
 import logging
+import functools
 from contextlib import contextmanager
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+from flask import g, has_request_context
 import hashlib
+import hmac
+import bcrypt
 from datetime import datetime
-import json
+import orjson
+import msgpack
 
 logger = logging.getLogger(__name__)
 
 # Database path
 DB_PATH = os.path.join(os.path.dirname(__file__), 'crop_health.db')
 
+# Per-connection tuning; journal_mode=WAL is persistent and set once in init_db
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",      # one fsync per commit under WAL
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",       # 64MB page cache
+    "PRAGMA mmap_size=30000000000",
+    "PRAGMA busy_timeout=5000",       # wait for the writer instead of failing
+)
+
+# Hot lookups, shared so every call hits the connection's statement cache
+_SQL_USER_BY_EMAIL = """
+    SELECT id, username, email, password_hash, created_at
+    FROM users WHERE email = ?
+"""
+_SQL_USER_BY_ID = """
+    SELECT id, username, email, created_at
+    FROM users WHERE id = ?
+"""
+# Fields with their latest prediction in one query, so listing doesn't need a
+# follow-up lookup per field
+_SQL_FIELDS_BY_USER = """
+    SELECT f.id, f.user_id, f.name, f.location, f.latitude, f.longitude, f.area_hectares, f.crop_type,
+           f.created_at, f.updated_at,
+           p.health_score, p.ndvi_value, p.status, p.created_at AS last_prediction
+    FROM fields f
+    LEFT JOIN (
+        SELECT field_id, health_score, ndvi_value, status, created_at,
+               ROW_NUMBER() OVER (PARTITION BY field_id ORDER BY created_at DESC, id DESC) AS rn
+        FROM predictions
+        WHERE user_id = ?
+    ) p ON p.field_id = f.id AND p.rn = 1
+    WHERE f.user_id = ?
+    ORDER BY f.created_at DESC
+"""
+_SQL_FIELD_COLUMNS = "id, user_id, name, location, latitude, longitude, area_hectares, crop_type, created_at, updated_at"
+_SQL_FIELD_BY_ID = f"""
+    SELECT {_SQL_FIELD_COLUMNS}
+    FROM fields WHERE id = ? AND user_id = ?
+"""
+_SQL_PREDICTIONS_BY_FIELD = """
+    SELECT id, field_id, user_id, data_filename, health_score, ndvi_value, confidence, status, prediction_data, created_at
+    FROM predictions WHERE field_id = ? AND user_id = ?
+    ORDER BY created_at DESC
+"""
+
+# Opened connections are kept and handed out again instead of reconnecting
+# (and re-reading the schema) on every call
+SQLITE_POOL_SIZE = int(os.getenv('SQLITE_POOL_SIZE', (os.cpu_count() or 4) * 2))
+_pool = queue.LifoQueue(maxsize=SQLITE_POOL_SIZE)
+
+def _connect():
+    """Open a tuned connection that may be reused from any thread"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def _close(conn):
+    """Refresh planner statistics if needed, then close the connection"""
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass
+    conn.close()
+
+def _close_pool():
+    """Close pooled connections at exit"""
+    while True:
+        try:
+            _close(_pool.get_nowait())
+        except queue.Empty:
+            break
+
+atexit.register(_close_pool)
+
+# Long-running servers re-run PRAGMA optimize so planner statistics follow the data
+SQLITE_OPTIMIZE_INTERVAL = int(os.getenv('SQLITE_OPTIMIZE_INTERVAL', 6 * 3600))
+_optimizer = None
+
+def _optimize_periodically():
+    """Run PRAGMA optimize every SQLITE_OPTIMIZE_INTERVAL seconds"""
+    while True:
+        time.sleep(SQLITE_OPTIMIZE_INTERVAL)
+        try:
+            with get_db_connection() as conn:
+                conn.execute("PRAGMA optimize")
+        except Exception as e:
+            logger.error(f"PRAGMA optimize failed: {e}")
+
+def _start_optimizer():
+    """Start the periodic optimizer thread once per process"""
+    global _optimizer
+    if _optimizer is None:
+        _optimizer = threading.Thread(target=_optimize_periodically, name='sqlite-optimize', daemon=True)
+        _optimizer.start()
+
+def _columns(cursor):
+    """Column names of the cursor's current result set"""
+    return [column[0] for column in cursor.description]
+
+def _fetchone_dict(cursor):
+    """Fetch the next row as a dict, or None"""
+    row = cursor.fetchone()
+    return dict(zip(_columns(cursor), row)) if row else None
+
+def _fetchall_dicts(cursor):
+    """Fetch the remaining rows as dicts, resolving column names once"""
+    columns = _columns(cursor)
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def _checkout():
+    """Take a connection from the pool, opening one if it's empty"""
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        return _connect()
+
+def _checkin(conn):
+    """Return a connection to the pool, closing it if the pool is full"""
+    # Never hand out a connection with a transaction still open
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        _close(conn)
+
 @contextmanager
 def get_db_connection():
-    """Context manager for SQLite database connections"""
-    conn = None
+    """Context manager for pooled SQLite database connections
+    
+    Within a Flask request every call shares one connection, handed back to
+    the pool by release_request_connection when the request is torn down.
+    """
+    request_scoped = has_request_context()
+    conn = g.get('sqlite_conn') if request_scoped else None
+    if conn is None:
+        conn = _checkout()
+        if request_scoped:
+            g.sqlite_conn = conn
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
         yield conn
     except Exception as e:
-        if conn:
-            conn.rollback()
+        conn.rollback()
         logger.error(f"Database error: {e}")
         raise
     finally:
-        if conn:
-            conn.close()
+        if request_scoped:
+            if conn.in_transaction:
+                conn.rollback()
+        else:
+            _checkin(conn)
+
+def release_request_connection(exc=None):
+    """teardown_request hook returning the request's connection to the pool"""
+    conn = g.pop('sqlite_conn', None)
+    if conn is not None:
+        _checkin(conn)
 
 def init_db():
     """Initialize SQLite database tables"""
@@ -34,6 +186,18 @@ def init_db():
         with get_db_connection() as conn:
             cursor = conn.cursor()
             
+            # Larger pages mean shallower B-trees and fewer overflow pages for
+            # prediction BLOBs. Only takes effect when the file is first created;
+            # it must come before the switch to WAL
+            cursor.execute("PRAGMA page_size=8192")
+            
+            # WAL lets readers proceed alongside a writer; the mode sticks to the file
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
+            # Schema and demo seed are written in one transaction, so one commit.
+            # An explicit BEGIN is needed since sqlite3 doesn't open one for DDL
+            cursor.execute("BEGIN")
+            
             # Create users table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS users (
@@ -72,7 +236,7 @@ def init_db():
                     ndvi_value REAL,
                     confidence REAL,
                     status TEXT,
-                    prediction_data TEXT,  -- JSON as TEXT in SQLite
+                    prediction_data BLOB,  -- msgpack (older rows: JSON text)
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
@@ -93,16 +257,16 @@ def init_db():
             
             # Create indexes
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_fields_user_id ON fields(user_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_predictions_field_id ON predictions(field_id)")
+            # Serves get_predictions_by_field's filter and ORDER BY without a sort;
+            # supersedes the old single-column field_id index
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_predictions_field_user_created ON predictions(field_id, user_id, created_at DESC)")
+            cursor.execute("DROP INDEX IF EXISTS idx_predictions_field_id")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_user_id ON alerts(user_id)")
             
-            conn.commit()
-            logger.info(f"SQLite database initialized at {DB_PATH}")
-            
             # Create demo user if it doesn't exist
             cursor.execute("SELECT id FROM users WHERE email = ?", ('demo@crophealth.com',))
             if not cursor.fetchone():
-                demo_password_hash = hashlib.sha256('demo123'.encode()).hexdigest()
+                demo_password_hash = hash_password('demo123')
                 cursor.execute("""
                     INSERT INTO users (username, email, password_hash)
                     VALUES (?, ?, ?)
@@ -116,20 +280,48 @@ def init_db():
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                 """, (user_id, 'Demo Farm Field', 'New York, USA', 40.7128, -74.0060, 25.5, 'Corn'))
                 
-                conn.commit()
                 logger.info("Demo user and field created")
+                
+                # Give the query planner statistics for the fresh database
+                cursor.execute("ANALYZE")
+            
+            conn.commit()
+            logger.info(f"SQLite database initialized at {DB_PATH}")
+        
+        _start_optimizer()
             
     except Exception as e:
         logger.error(f"Error initializing SQLite database: {e}")
         raise
 
+# bcrypt work factor; each +1 doubles hashing time
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+
 def hash_password(password):
-    """Hash a password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash a password using bcrypt (salted, adaptive cost)"""
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
 def verify_password(password, password_hash):
     """Verify a password against its hash"""
-    return hashlib.sha256(password.encode()).hexdigest() == password_hash
+    if password_hash.startswith('$2'):
+        try:
+            return bcrypt.checkpw(password.encode(), password_hash.encode())
+        except ValueError:
+            return False
+    # Legacy unsalted SHA-256 hashes from before the bcrypt migration
+    return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), password_hash)
+
+# INSERT ... RETURNING hands back the new row in the same statement (SQLite 3.35+)
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35)
+
+def _insert_returning(cursor, table, insert_sql, params, columns):
+    """Insert a row and fetch it back with the given columns"""
+    if _HAS_RETURNING:
+        cursor.execute(f"{insert_sql} RETURNING {columns}", params)
+        return _fetchone_dict(cursor)
+    cursor.execute(insert_sql, params)
+    cursor.execute(f"SELECT {columns} FROM {table} WHERE id = ?", (cursor.lastrowid,))
+    return _fetchone_dict(cursor)
 
 # User model functions for SQLite
 class UserModel:
@@ -140,21 +332,12 @@ class UserModel:
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
+                user = _insert_returning(cursor, 'users', """
                     INSERT INTO users (username, email, password_hash)
                     VALUES (?, ?, ?)
-                """, (username, email, password_hash))
-                
-                user_id = cursor.lastrowid
+                """, (username, email, password_hash), "id, username, email, created_at")
                 conn.commit()
-                
-                # Fetch the created user
-                cursor.execute("""
-                    SELECT id, username, email, created_at
-                    FROM users WHERE id = ?
-                """, (user_id,))
-                user = cursor.fetchone()
-                return dict(user) if user else None
+                return user
         except sqlite3.IntegrityError as e:
             logger.error(f"User creation failed: {e}")
             return None
@@ -165,12 +348,8 @@ class UserModel:
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, username, email, password_hash, created_at
-                    FROM users WHERE email = ?
-                """, (email,))
-                user = cursor.fetchone()
-                return dict(user) if user else None
+                cursor.execute(_SQL_USER_BY_EMAIL, (email,))
+                return _fetchone_dict(cursor)
         except Exception as e:
             logger.error(f"Error fetching user: {e}")
             return None
@@ -181,56 +360,152 @@ class UserModel:
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, username, email, created_at
-                    FROM users WHERE id = ?
-                """, (user_id,))
-                user = cursor.fetchone()
-                return dict(user) if user else None
+                cursor.execute(_SQL_USER_BY_ID, (user_id,))
+                return _fetchone_dict(cursor)
         except Exception as e:
             logger.error(f"Error fetching user: {e}")
             return None
 
+# Field writes are funnelled through one thread with its own connection, so
+# writes from the same worker process queue instead of contending for SQLite's
+# write lock. Each gunicorn worker runs its own writer, and those still contend
+# for the file lock with each other; busy_timeout makes them wait rather than
+# fail with SQLITE_BUSY unless a lock is held for longer than that.
+WRITER_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_WRITER_BUSY_TIMEOUT_MS', 5000))
+# Upper bound on how long a request waits for its queued write
+WRITE_TIMEOUT = float(os.getenv('SQLITE_WRITE_TIMEOUT', 30))
+_write_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+class DatabaseBusyError(Exception):
+    """A field write could not be run in time, or the writer couldn't open the database"""
+
+def _writer_loop():
+    """Run queued write tasks one at a time, committing each"""
+    global _writer
+    try:
+        conn = _connect()
+        conn.execute(f"PRAGMA busy_timeout={WRITER_BUSY_TIMEOUT_MS}")
+    except Exception as e:
+        logger.error(f"SQLite writer could not open the database: {e}")
+        # Let the next write start a fresh writer, and fail what's already queued
+        with _writer_lock:
+            _writer = None
+        while True:
+            try:
+                _, future = _write_queue.get_nowait()
+            except queue.Empty:
+                return
+            if future.set_running_or_notify_cancel():
+                future.set_exception(DatabaseBusyError(f"Database unavailable: {e}"))
+    while True:
+        task, future = _write_queue.get()
+        # Skip writes whose caller already gave up waiting
+        if not future.set_running_or_notify_cancel():
+            continue
+        try:
+            result = task(conn.cursor())
+            conn.commit()
+        except BaseException as e:
+            conn.rollback()
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+def _ensure_writer():
+    """Start the writer thread in this process on first use"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_writer_loop, name='sqlite-writer', daemon=True)
+                _writer.start()
+
+def _run_write(task):
+    """Run task(cursor) on this process's writer thread and return its result
+    
+    Serializes writes within the process only; other worker processes may still
+    hold the database write lock, which the writer waits out via busy_timeout.
+    Raises DatabaseBusyError if the write hasn't finished within WRITE_TIMEOUT.
+    """
+    _ensure_writer()
+    future = Future()
+    _write_queue.put((task, future))
+    try:
+        return future.result(timeout=WRITE_TIMEOUT)
+    except FuturesTimeoutError:
+        # Drop the write if it hasn't started; one already running still commits
+        future.cancel()
+        raise DatabaseBusyError(f"Write did not complete within {WRITE_TIMEOUT}s")
+
+@functools.lru_cache(maxsize=64)
+def _update_field_sql(columns):
+    """UPDATE statement for a sorted tuple of column names
+    
+    Built once per column set so repeated updates reuse the same text and hit
+    the connection's statement cache instead of being parsed again.
+    """
+    sets = ', '.join(f"{column} = ?" for column in columns)
+    update_sql = f"UPDATE fields SET {sets}, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND user_id = ?"
+    if _HAS_RETURNING:
+        return f"{update_sql} RETURNING {_SQL_FIELD_COLUMNS}"
+    return update_sql
+
+_UPDATABLE_FIELD_COLUMNS = frozenset(('name', 'location', 'latitude', 'longitude', 'area_hectares', 'crop_type'))
+
 # Field model functions for SQLite
 class FieldModel:
+    @staticmethod
+    def create_fields(rows):
+        """Create several fields in a single transaction
+        
+        rows: (user_id, name, location, latitude, longitude, area_hectares, crop_type) tuples
+        """
+        def insert(cursor):
+            cursor.executemany("""
+                INSERT INTO fields (user_id, name, location, latitude, longitude, area_hectares, crop_type)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            # The write lock is held for the whole transaction, so the new
+            # rows have consecutive ids ending at last_insert_rowid()
+            last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+            cursor.execute(f"SELECT {_SQL_FIELD_COLUMNS} FROM fields WHERE id BETWEEN ? AND ? ORDER BY id",
+                           (last_id - len(rows) + 1, last_id))
+            return _fetchall_dicts(cursor)
+        try:
+            return _run_write(insert)
+        except DatabaseBusyError:
+            raise
+        except Exception as e:
+            logger.error(f"Error creating fields: {e}")
+            return []
+    
     @staticmethod
     def create_field(user_id, name, location, latitude, longitude, area_hectares, crop_type):
         """Create a new field"""
+        def insert(cursor):
+            return _insert_returning(cursor, 'fields', """
+                INSERT INTO fields (user_id, name, location, latitude, longitude, area_hectares, crop_type)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (user_id, name, location, latitude, longitude, area_hectares, crop_type),
+                _SQL_FIELD_COLUMNS)
         try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO fields (user_id, name, location, latitude, longitude, area_hectares, crop_type)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (user_id, name, location, latitude, longitude, area_hectares, crop_type))
-                
-                field_id = cursor.lastrowid
-                conn.commit()
-                
-                # Fetch the created field
-                cursor.execute("""
-                    SELECT id, user_id, name, location, latitude, longitude, area_hectares, crop_type, created_at, updated_at
-                    FROM fields WHERE id = ?
-                """, (field_id,))
-                field = cursor.fetchone()
-                return dict(field) if field else None
+            return _run_write(insert)
+        except DatabaseBusyError:
+            raise
         except Exception as e:
             logger.error(f"Error creating field: {e}")
             return None
     
     @staticmethod
     def get_fields_by_user(user_id):
-        """Get all fields for a user"""
+        """Get all fields for a user, each with its latest prediction"""
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, user_id, name, location, latitude, longitude, area_hectares, crop_type, created_at, updated_at
-                    FROM fields WHERE user_id = ?
-                    ORDER BY created_at DESC
-                """, (user_id,))
-                fields = cursor.fetchall()
-                return [dict(field) for field in fields]
+                cursor.execute(_SQL_FIELDS_BY_USER, (user_id, user_id))
+                return _fetchall_dicts(cursor)
         except Exception as e:
             logger.error(f"Error fetching fields: {e}")
             return []
@@ -241,15 +516,82 @@ class FieldModel:
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, user_id, name, location, latitude, longitude, area_hectares, crop_type, created_at, updated_at
-                    FROM fields WHERE id = ? AND user_id = ?
-                """, (field_id, user_id))
-                field = cursor.fetchone()
-                return dict(field) if field else None
+                cursor.execute(_SQL_FIELD_BY_ID, (field_id, user_id))
+                return _fetchone_dict(cursor)
         except Exception as e:
             logger.error(f"Error fetching field: {e}")
             return None
+    
+    @staticmethod
+    def update_field(field_id, user_id, **kwargs):
+        """Update a field"""
+        updates = {key: value for key, value in kwargs.items()
+                   if key in _UPDATABLE_FIELD_COLUMNS and value is not None}
+        if not updates:
+            return None
+        columns = tuple(sorted(updates))
+        params = (*(updates[column] for column in columns), field_id, user_id)
+        def update(cursor):
+            cursor.execute(_update_field_sql(columns), params)
+            if _HAS_RETURNING:
+                return _fetchone_dict(cursor)
+            if cursor.rowcount:
+                cursor.execute(_SQL_FIELD_BY_ID, (field_id, user_id))
+                return _fetchone_dict(cursor)
+            return None
+        try:
+            return _run_write(update)
+        except DatabaseBusyError:
+            raise
+        except Exception as e:
+            logger.error(f"Error updating field: {e}")
+            return None
+    
+    @staticmethod
+    def delete_field(field_id, user_id):
+        """Delete a field"""
+        def delete(cursor):
+            cursor.execute("DELETE FROM fields WHERE id = ? AND user_id = ?", (field_id, user_id))
+            return cursor.rowcount > 0
+        try:
+            return _run_write(delete)
+        except DatabaseBusyError:
+            raise
+        except Exception as e:
+            logger.error(f"Error deleting field: {e}")
+            return False
+
+def _msgpack_default(obj):
+    """Encode numpy arrays/scalars as plain lists/numbers so they read back JSON-ready"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+def _pack_prediction_data(data):
+    """Encode prediction_data for the BLOB column"""
+    return msgpack.packb(data, use_bin_type=True, default=_msgpack_default)
+
+def _unpack_prediction_data(value):
+    """Decode prediction_data; rows written before the BLOB switch hold JSON text
+
+    Those rows were JSON-encoded twice (once by the route, once here), so keep
+    decoding until the text yields an object:
+
+    >>> import json
+    >>> _unpack_prediction_data(json.dumps(json.dumps({'ndvi': [0.5]})))
+    {'ndvi': [0.5]}
+    >>> _unpack_prediction_data(_pack_prediction_data({'ndvi': [0.5]}))
+    {'ndvi': [0.5]}
+    """
+    if isinstance(value, bytes):
+        return msgpack.unpackb(value, raw=False)
+    value = orjson.loads(value)
+    while isinstance(value, str):
+        try:
+            value = orjson.loads(value)
+        except orjson.JSONDecodeError:
+            break
+    return value
 
 # Prediction model functions for SQLite
 class PredictionModel:
@@ -259,29 +601,17 @@ class PredictionModel:
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                prediction_json = json.dumps(prediction_data) if prediction_data else None
-                cursor.execute("""
+                packed_data = _pack_prediction_data(prediction_data) if prediction_data else None
+                prediction = _insert_returning(cursor, 'predictions', """
                     INSERT INTO predictions (field_id, user_id, data_filename, health_score, ndvi_value, confidence, status, prediction_data)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (field_id, user_id, data_filename, health_score, ndvi_value, confidence, status, prediction_json))
-                
-                prediction_id = cursor.lastrowid
+                """, (field_id, user_id, data_filename, health_score, ndvi_value, confidence, status, packed_data),
+                    "id, field_id, user_id, data_filename, health_score, ndvi_value, confidence, status, prediction_data, created_at")
                 conn.commit()
                 
-                # Fetch the created prediction
-                cursor.execute("""
-                    SELECT id, field_id, user_id, data_filename, health_score, ndvi_value, confidence, status, prediction_data, created_at
-                    FROM predictions WHERE id = ?
-                """, (prediction_id,))
-                prediction = cursor.fetchone()
-                
-                if prediction:
-                    result = dict(prediction)
-                    # Parse JSON data
-                    if result['prediction_data']:
-                        result['prediction_data'] = json.loads(result['prediction_data'])
-                    return result
-                return None
+                if prediction and prediction['prediction_data']:
+                    prediction['prediction_data'] = _unpack_prediction_data(prediction['prediction_data'])
+                return prediction
         except Exception as e:
             logger.error(f"Error creating prediction: {e}")
             return None
@@ -292,21 +622,30 @@ class PredictionModel:
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, field_id, user_id, data_filename, health_score, ndvi_value, confidence, status, prediction_data, created_at
-                    FROM predictions WHERE field_id = ? AND user_id = ?
-                    ORDER BY created_at DESC
-                """, (field_id, user_id))
-                predictions = cursor.fetchall()
-                
-                result = []
+                cursor.execute(_SQL_PREDICTIONS_BY_FIELD, (field_id, user_id))
+                predictions = _fetchall_dicts(cursor)
                 for prediction in predictions:
-                    pred_dict = dict(prediction)
-                    # Parse JSON data
-                    if pred_dict['prediction_data']:
-                        pred_dict['prediction_data'] = json.loads(pred_dict['prediction_data'])
-                    result.append(pred_dict)
-                return result
+                    if prediction['prediction_data']:
+                        prediction['prediction_data'] = _unpack_prediction_data(prediction['prediction_data'])
+                return predictions
         except Exception as e:
             logger.error(f"Error fetching predictions: {e}")
             return []
+    
+    @staticmethod
+    def iter_predictions_by_field(field_id, user_id):
+        """Yield predictions for a field one row at a time"""
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(_SQL_PREDICTIONS_BY_FIELD, (field_id, user_id))
+                columns = _columns(cursor)
+                for row in cursor:
+                    pred_dict = dict(zip(columns, row))
+                    if pred_dict['prediction_data']:
+                        pred_dict['prediction_data'] = _unpack_prediction_data(pred_dict['prediction_data'])
+                    yield pred_dict
+        except Exception as e:
+            # Raised rather than swallowed so a stream cut short isn't mistaken for the full history
+            logger.error(f"Error streaming predictions: {e}")
+            raise
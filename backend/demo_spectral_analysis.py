@@ -7,55 +7,46 @@ import numpy as np
 import json
 from utils.ndvi import generate_comprehensive_spectral_analysis
 
+# Row of each band in the sample data block
+BAND_INDEX = {'red': 0, 'green': 1, 'nir': 2, 'swir': 3}
+
 def generate_sample_data():
     """Generate realistic satellite spectral band data"""
     
+    rng = np.random.default_rng()
+    
     # Simulate different land cover types
     n_pixels = 200
-    
-    # Dense vegetation area (40% of pixels)
-    dense_veg_count = int(n_pixels * 0.4)
-    dense_red = np.random.uniform(0.03, 0.08, dense_veg_count)
-    dense_green = np.random.uniform(0.05, 0.12, dense_veg_count) 
-    dense_nir = np.random.uniform(0.6, 0.9, dense_veg_count)
-    dense_swir = np.random.uniform(0.05, 0.15, dense_veg_count)
-    
-    # Sparse vegetation (30% of pixels)
-    sparse_veg_count = int(n_pixels * 0.3)
-    sparse_red = np.random.uniform(0.08, 0.15, sparse_veg_count)
-    sparse_green = np.random.uniform(0.10, 0.18, sparse_veg_count)
-    sparse_nir = np.random.uniform(0.3, 0.5, sparse_veg_count)
-    sparse_swir = np.random.uniform(0.15, 0.25, sparse_veg_count)
-    
-    # Water bodies (15% of pixels)  
-    water_count = int(n_pixels * 0.15)
-    water_red = np.random.uniform(0.02, 0.05, water_count)
-    water_green = np.random.uniform(0.03, 0.07, water_count)
-    water_nir = np.random.uniform(0.01, 0.08, water_count)
-    water_swir = np.random.uniform(0.001, 0.02, water_count)
-    
-    # Bare soil/urban (15% of pixels)
-    bare_count = n_pixels - dense_veg_count - sparse_veg_count - water_count
-    bare_red = np.random.uniform(0.15, 0.25, bare_count)
-    bare_green = np.random.uniform(0.18, 0.28, bare_count)
-    bare_nir = np.random.uniform(0.25, 0.45, bare_count)
-    bare_swir = np.random.uniform(0.30, 0.50, bare_count)
-    
-    # Combine all land cover types
-    red_band = np.concatenate([dense_red, sparse_red, water_red, bare_red])
-    green_band = np.concatenate([dense_green, sparse_green, water_green, bare_green])
-    nir_band = np.concatenate([dense_nir, sparse_nir, water_nir, bare_nir])
-    swir_band = np.concatenate([dense_swir, sparse_swir, water_swir, bare_swir])
-    
-    # Shuffle to randomize spatial arrangement
-    indices = np.random.permutation(n_pixels)
-    
-    return {
-        'red': red_band[indices],
-        'green': green_band[indices],
-        'nir': nir_band[indices],
-        'swir': swir_band[indices]
-    }
+    dense_veg_count = int(n_pixels * 0.4)   # Dense vegetation (40% of pixels)
+    sparse_veg_count = int(n_pixels * 0.3)  # Sparse vegetation (30% of pixels)
+    water_count = int(n_pixels * 0.15)      # Water bodies (15% of pixels)
+    bare_count = n_pixels - dense_veg_count - sparse_veg_count - water_count  # Bare soil/urban
+    
+    # Reflectance range per band for each land cover type
+    land_cover = [
+        (dense_veg_count, {'red': (0.03, 0.08), 'green': (0.05, 0.12), 'nir': (0.6, 0.9), 'swir': (0.05, 0.15)}),
+        (sparse_veg_count, {'red': (0.08, 0.15), 'green': (0.10, 0.18), 'nir': (0.3, 0.5), 'swir': (0.15, 0.25)}),
+        (water_count, {'red': (0.02, 0.05), 'green': (0.03, 0.07), 'nir': (0.01, 0.08), 'swir': (0.001, 0.02)}),
+        (bare_count, {'red': (0.15, 0.25), 'green': (0.18, 0.28), 'nir': (0.25, 0.45), 'swir': (0.30, 0.50)}),
+    ]
+    
+    # All bands live in one contiguous (band, pixel) block; fill each land
+    # cover's slice of it in place
+    bands = np.empty((len(BAND_INDEX), n_pixels), dtype=np.float32)
+    offset = 0
+    for count, ranges in land_cover:
+        for name, (low, high) in ranges.items():
+            segment = bands[BAND_INDEX[name], offset:offset + count]
+            rng.random(dtype=np.float32, out=segment)
+            segment *= high - low
+            segment += low
+        offset += count
+    
+    # Shuffle to randomize spatial arrangement (same permutation for every band)
+    bands = bands.take(rng.permutation(n_pixels), axis=1)
+    
+    # Rows of the block are contiguous views, so the dict adds no copies
+    return {name: bands[index] for name, index in BAND_INDEX.items()}
 
 def demo_spectral_analysis():
     """Run a complete demonstration of spectral analysis"""
@@ -148,20 +139,20 @@ def demo_spectral_analysis():
             'data': analysis_result,
             'metadata': {
                 'pixels_analyzed': len(spectral_data['red']),
-                'bands_used': ['red', 'green', 'nir', 'swir'],
+                'bands_used': list(BAND_INDEX),
                 'indices_calculated': list(analysis_result.get('indices_stats', {}).keys()),
                 'timestamp': '2024-01-15T10:00:00Z'
             }
         }
         
         # Save to file for frontend testing
+        # Serialize once (numpy arrays converted to lists) and reuse the text for the size
+        payload = json.dumps(demo_result, default=lambda x: x.tolist() if hasattr(x, 'tolist') else x, indent=2)
         with open('demo_spectral_result.json', 'w') as f:
-            # Convert numpy arrays to lists for JSON serialization
-            json_result = json.loads(json.dumps(demo_result, default=lambda x: x.tolist() if hasattr(x, 'tolist') else x))
-            json.dump(json_result, f, indent=2)
+            f.write(payload)
         
         print(f"\n💾 Demo results saved to 'demo_spectral_result.json'")
-        print(f"   File size: {len(json.dumps(json_result))} characters")
+        print(f"   File size: {len(payload)} characters")
         
         return True
         
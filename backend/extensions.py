@@ -0,0 +1,48 @@
+from datetime import date
+from decimal import Decimal
+from flask import current_app
+from flask.json.provider import JSONProvider
+from flask_caching import Cache
+from flask_compress import Compress
+from werkzeug.http import http_date
+import orjson
+
+# Shared extension instances, bound to the app in app.py so blueprints can
+# import them without a circular import
+cache = Cache()
+compress = Compress()
+
+def cache_is_per_process():
+    """True when cached values live in each worker's memory, out of reach of other workers' invalidations"""
+    return current_app.config.get('CACHE_TYPE', '').rsplit('.', 1)[-1] in ('SimpleCache', 'simple')
+
+# NumPy arrays and scalars serialize natively; datetimes are handed to
+# orjson_default so they keep Flask's HTTP-date format
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+def orjson_default(obj):
+    """Encode dates and decimals the way Flask's own JSON provider does"""
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def orjson_dumps(obj):
+    """Serialize to JSON bytes with orjson"""
+    return orjson.dumps(obj, default=orjson_default, option=ORJSON_OPTIONS)
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify and request.get_json"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson_dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson_dumps(obj), mimetype='application/json')
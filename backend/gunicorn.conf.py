@@ -0,0 +1,21 @@
+"""Gunicorn settings for the backend API"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+timeout = 120
+
+# Threaded workers: requests waiting on the database or external APIs overlap,
+# while model inference, spectral analysis, bcrypt and SQLite calls still run on
+# real threads. gevent can be selected via GUNICORN_WORKER_CLASS, but it turns
+# those threads into greenlets on one hub, so any CPU-bound or sqlite3 call then
+# stalls every request in the worker and the analysis/inference timeouts can't fire
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 100))
+
+def post_fork(server, worker):
+    """Make psycopg2 yield to other greenlets while waiting on Postgres"""
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
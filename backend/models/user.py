@@ -1,12 +1,16 @@
 # Use SQLite for demo
 try:
-    from database.sqlite_db import UserModel as DbUserModel, verify_password
+    from database.sqlite_db import UserModel as DbUserModel, hash_password, verify_password
 except ImportError:
-    from database.db import UserModel as DbUserModel, verify_password
+    from database.db import UserModel as DbUserModel, hash_password, verify_password
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Checked against when the email is unknown so a miss costs as much as a
+# wrong password and response time doesn't reveal which accounts exist
+_DUMMY_HASH = hash_password('dummy-password')
+
 class User:
     def __init__(self, id=None, username=None, email=None, created_at=None):
         self.id = id
@@ -32,7 +36,10 @@ class User:
             return None
         
         user_data = DbUserModel.get_user_by_email(email)
-        if user_data and verify_password(password, user_data['password_hash']):
+        if not user_data:
+            verify_password(password, _DUMMY_HASH)
+            return None
+        if verify_password(password, user_data['password_hash']):
             return cls(
                 id=user_data['id'],
                 username=user_data['username'],
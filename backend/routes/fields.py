@@ -1,121 +1,193 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import os
+from flask import Blueprint, request, current_app, g
+from flask_jwt_extended import jwt_required
 # Use SQLite for demo
 try:
-    from database.sqlite_db import FieldModel
+    from database.sqlite_db import FieldModel, DatabaseBusyError
 except ImportError:
     from database.db import FieldModel
+    
+    class DatabaseBusyError(Exception):
+        """Never raised by the Postgres models, whose writes run on the request's connection"""
+from extensions import cache, cache_is_per_process, orjson_dumps
 import logging
+import orjson
 
 fields_bp = Blueprint('fields', __name__)
 logger = logging.getLogger(__name__)
 
-@fields_bp.route('/debug', methods=['POST'])
+# Client-settable field attributes, in FieldModel.create_field's argument order
+FIELD_ATTRIBUTES = ('name', 'location', 'latitude', 'longitude', 'area_hectares', 'crop_type')
+REQUIRED_FIELD_ATTRIBUTES = frozenset(('name',))
+
+def _missing_attributes(data):
+    """Required attributes that are absent or empty in a field payload"""
+    return {key for key in REQUIRED_FIELD_ATTRIBUTES if not data.get(key)}
+
+def _missing_error(missing):
+    """400 response naming the missing required attributes"""
+    logger.warning("Field %s is missing", ', '.join(sorted(missing)))
+    return _json({'error': f"Field {', '.join(sorted(missing))} is required"}, 400)
+
+def _json(obj, status=200):
+    """JSON response serialized with orjson"""
+    return current_app.response_class(orjson_dumps(obj), status=status, mimetype='application/json')
+
+def _conditional_json(obj):
+    """JSON response tagged with a hash of its body; 304 when the client's copy matches"""
+    response = _json(obj)
+    response.add_etag()
+    return response.make_conditional(request)
+
+def _request_json():
+    """Parsed request body, or None when it is empty or not valid JSON"""
+    try:
+        return orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        return None
+
 def debug_create_field():
     """Debug endpoint to test field creation without auth"""
     try:
-        data = request.get_json()
-        logger.info(f"Debug - Received data: {data}")
-        return jsonify({'message': 'Debug endpoint working', 'data': data}), 200
+        data = _request_json()
+        logger.info("Debug - Received data: %s", data)
+        return _json({'message': 'Debug endpoint working', 'data': data}, 200)
     except Exception as e:
-        logger.error(f"Debug endpoint error: {e}")
-        return jsonify({'error': str(e)}), 500
+        logger.exception("Debug endpoint error: %s", e)
+        return _json({'error': str(e)}, 500)
+
+# Unauthenticated echo endpoint, only registered for local development
+if os.getenv('FLASK_ENV') == 'development':
+    fields_bp.add_url_rule('/debug', view_func=debug_create_field, methods=['POST'])
+
+# Only cached on a shared backend: with per-worker SimpleCache a write would
+# evict the list in one worker while the others kept serving it
+@cache.memoize(timeout=15, unless=cache_is_per_process)
+def get_cached_fields(user_id):
+    """Fields for a user, cached briefly between writes"""
+    return FieldModel.get_fields_by_user(user_id)
+
+def invalidate_fields_cache(user_id):
+    """Drop the cached field list after a user's fields or predictions change"""
+    cache.delete_memoized(get_cached_fields, user_id)
 
 @fields_bp.route('', methods=['GET'])
 @jwt_required()
 def list_fields():
     try:
-        user_id = int(get_jwt_identity())
-        fields = FieldModel.get_fields_by_user(user_id)
-        return jsonify({'fields': fields}), 200
+        user_id = g.user_id
+        fields = get_cached_fields(user_id)
+        return _conditional_json({'fields': fields})
     except Exception as e:
-        logger.error(f"List fields error: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.exception("List fields error: %s", e)
+        return _json({'error': 'Internal server error'}, 500)
 
 @fields_bp.route('', methods=['POST'])
 @jwt_required()
 def create_field():
     try:
-        user_id = int(get_jwt_identity())
-        logger.info(f"Creating field for user: {user_id}")
+        user_id = g.user_id
+        logger.info("Creating field for user: %s", user_id)
         
-        data = request.get_json()
-        logger.info(f"Received data: {data}")
+        data = _request_json()
+        logger.info("Received data: %s", data)
         
-        if not data:
+        if not data or not isinstance(data, (dict, list)):
             logger.warning("No JSON data received")
-            return jsonify({'error': 'No data provided'}), 400
-        
-        name = data.get('name')
-        location = data.get('location')
-        latitude = data.get('latitude')
-        longitude = data.get('longitude')
-        area_hectares = data.get('area_hectares')
-        crop_type = data.get('crop_type')
+            return _json({'error': 'No data provided'}, 400)
+        if isinstance(data, list):
+            return _create_fields(user_id, data)
         
-        logger.info(f"Field data - Name: {name}, Location: {location}, Lat: {latitude}, Lng: {longitude}, Area: {area_hectares}, Crop: {crop_type}")
+        missing = _missing_attributes(data)
+        if missing:
+            return _missing_error(missing)
         
-        if not name:
-            logger.warning("Field name is missing")
-            return jsonify({'error': 'Field name is required'}), 400
+        name, location, latitude, longitude, area_hectares, crop_type = map(data.get, FIELD_ATTRIBUTES)
+        logger.info("Field data - Name: %s, Location: %s, Lat: %s, Lng: %s, Area: %s, Crop: %s",
+                    name, location, latitude, longitude, area_hectares, crop_type)
         
         field = FieldModel.create_field(user_id, name, location, latitude, longitude, area_hectares, crop_type)
         if not field:
             logger.error("Failed to create field in database")
-            return jsonify({'error': 'Failed to create field'}), 500
+            return _json({'error': 'Failed to create field'}, 500)
         
-        logger.info(f"Field created successfully: {field}")
-        return jsonify({'field': field}), 201
+        invalidate_fields_cache(user_id)
+        logger.info("Field created successfully: %s", field)
+        return _json({'field': field}, 201)
+    except DatabaseBusyError as e:
+        logger.error("Field write unavailable: %s", e)
+        return _json({'error': 'Database is busy, please retry shortly'}, 503)
     except Exception as e:
-        logger.error(f"Create field error: {e}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.exception("Create field error: %s", e)
+        return _json({'error': 'Internal server error'}, 500)
+
+def _create_fields(user_id, items):
+    """Create every field in a batched POST body in one transaction"""
+    if not all(isinstance(item, dict) for item in items):
+        return _json({'error': 'No data provided'}, 400)
+    missing = set().union(*map(_missing_attributes, items))
+    if missing:
+        return _missing_error(missing)
+    
+    fields = FieldModel.create_fields([(user_id, *map(item.get, FIELD_ATTRIBUTES)) for item in items])
+    if not fields:
+        logger.error("Failed to create fields in database")
+        return _json({'error': 'Failed to create fields'}, 500)
+    
+    invalidate_fields_cache(user_id)
+    logger.info("Created %d fields for user: %s", len(fields), user_id)
+    return _json({'fields': fields}, 201)
 
 @fields_bp.route('/<int:field_id>', methods=['GET'])
 @jwt_required()
 def get_field(field_id):
     try:
-        user_id = int(get_jwt_identity())
-        field = FieldModel.get_field_by_id(field_id, user_id)
+        # Read on every request: a per-worker cache would keep serving a field
+        # another worker has already updated or deleted
+        field = FieldModel.get_field_by_id(field_id, g.user_id)
         if not field:
-            return jsonify({'error': 'Field not found'}), 404
-        return jsonify({'field': field}), 200
+            return _json({'error': 'Field not found'}, 404)
+        return _conditional_json({'field': field})
     except Exception as e:
-        logger.error(f"Get field error: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.exception("Get field error: %s", e)
+        return _json({'error': 'Internal server error'}, 500)
 
 @fields_bp.route('/<int:field_id>', methods=['PUT'])
 @jwt_required()
 def update_field(field_id):
     try:
-        user_id = int(get_jwt_identity())
-        data = request.get_json()
-        field = FieldModel.update_field(field_id, user_id, 
-                                        name=data.get('name'),
-                                        location=data.get('location'),
-                                        latitude=data.get('latitude'),
-                                        longitude=data.get('longitude'),
-                                        area_hectares=data.get('area_hectares'),
-                                        crop_type=data.get('crop_type'))
+        user_id = g.user_id
+        data = _request_json()
+        if not data or not isinstance(data, dict):
+            return _json({'error': 'No data provided'}, 400)
+        field = FieldModel.update_field(field_id, user_id,
+                                        **{key: data.get(key) for key in FIELD_ATTRIBUTES})
         
         if not field:
-            return jsonify({'error': 'Field not found or no changes made'}), 404
-        return jsonify({'field': field}), 200
+            return _json({'error': 'Field not found or no changes made'}, 404)
+        invalidate_fields_cache(user_id)
+        return _json({'field': field}, 200)
+    except DatabaseBusyError as e:
+        logger.error("Field write unavailable: %s", e)
+        return _json({'error': 'Database is busy, please retry shortly'}, 503)
     except Exception as e:
-        logger.error(f"Update field error: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.exception("Update field error: %s", e)
+        return _json({'error': 'Internal server error'}, 500)
 
 @fields_bp.route('/<int:field_id>', methods=['DELETE'])
 @jwt_required()
 def delete_field(field_id):
     try:
-        user_id = int(get_jwt_identity())
+        user_id = g.user_id
         deleted = FieldModel.delete_field(field_id, user_id)
         if not deleted:
-            return jsonify({'error': 'Field not found'}), 404
-        return jsonify({'message': 'Field deleted successfully'}), 200
+            return _json({'error': 'Field not found'}, 404)
+        invalidate_fields_cache(user_id)
+        return _json({'message': 'Field deleted successfully'}, 200)
+    except DatabaseBusyError as e:
+        logger.error("Field write unavailable: %s", e)
+        return _json({'error': 'Database is busy, please retry shortly'}, 503)
     except Exception as e:
-        logger.error(f"Delete field error: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.exception("Delete field error: %s", e)
+        return _json({'error': 'Internal server error'}, 500)
 
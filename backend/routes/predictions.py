@@ -1,8 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 # Use SQLite for demo
 try:
-    from database.sqlite_db import PredictionModel, FieldModel
+    from database.sqlite_db import FieldModel, PredictionModel
     # AlertModel not implemented in SQLite demo, using dummy
     class AlertModel:
         @staticmethod
@@ -13,23 +13,86 @@ try:
         def create_alert(field_id, user_id, alert_type, message, severity):
             return None
 except ImportError:
-    from database.db import PredictionModel, FieldModel, AlertModel
-from utils.data_processing import save_uploaded_file, process_uploaded_data, validate_processed_data, cleanup_file
-from utils.model_loader import predict_crop_health, get_model_info
+    from database.db import FieldModel, PredictionModel, AlertModel
+from routes.fields import invalidate_fields_cache
+from utils.data_processing import (
+    allowed_file, save_uploaded_file, process_uploaded_data, process_uploaded_stream, validate_processed_data, cleanup_file
+)
+from utils.model_loader import run_prediction, get_model_info
 from utils.ndvi import (
-    calculate_ndvi_from_data, generate_comprehensive_spectral_analysis, 
+    calculate_ndvi_from_data, run_spectral_analysis, AnalysisBusyError,
     interpret_ndvi, interpret_ndwi, interpret_ndsi, 
     calculate_all_indices, create_index_stack_analysis
 )
-from utils.hyperspectral_analysis import HyperspectralAnalyzer
+import numpy as np
 import logging
-import json
+from concurrent.futures import ThreadPoolExecutor
 import os
 from datetime import datetime
 
 predictions_bp = Blueprint('predictions', __name__)
 logger = logging.getLogger(__name__)
 
+# Network lookups that can overlap within one request (e.g. satellite + weather)
+_io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='io')
+
+# Columns of directly supplied input that make up the feature matrix, in order
+FEATURE_KEYS = ('ndvi', 'temperature', 'humidity', 'soil_moisture', 'ph')
+
+# Static descriptions of the indices shown by hyperspectral_visualization
+SPECTRAL_EXPLANATIONS = {
+    'ndvi': {
+        'name': 'Normalized Difference Vegetation Index',
+        'formula': '(NIR - Red) / (NIR + Red)',
+        'interpretation': {
+            'high': '0.6-0.9: Healthy vegetation',
+            'medium': '0.3-0.5: Moderate growth/stress',
+            'low': '<0.2: Poor vegetation/bare soil'
+        },
+        'significance': 'Primary indicator of plant health and biomass'
+    },
+    'ndwi': {
+        'name': 'Normalized Difference Water Index',
+        'formula': '(NIR - SWIR) / (NIR + SWIR)',
+        'interpretation': {
+            'high': '>0.5: Good water availability',
+            'medium': '0.2-0.5: Moderate water content',
+            'low': '<0.2: Water stress/drought'
+        },
+        'significance': 'Indicates water content in soil and plants'
+    },
+    'ndsi': {
+        'name': 'Normalized Difference Soil Index',
+        'formula': '(SWIR - Green) / (SWIR + Green)',
+        'interpretation': {
+            'high': '>0.4: Bare soil/degraded land',
+            'medium': '0.2-0.4: Partially vegetated',
+            'low': '<0.2: Well-covered vegetation'
+        },
+        'significance': 'Detects soil exposure and land degradation'
+    },
+    'mndwi': {
+        'name': 'Modified Normalized Difference Water Index',
+        'formula': '(Green - SWIR) / (Green + SWIR)',
+        'interpretation': {
+            'positive': '>0: Water bodies/very wet areas',
+            'near_zero': '~0: Mixed water-vegetation',
+            'negative': '<0: Dry land/vegetation'
+        },
+        'significance': 'Enhanced water body detection and moisture mapping'
+    },
+    'red_edge_ndvi': {
+        'name': 'Red Edge NDVI',
+        'formula': '(NIR - Red Edge) / (NIR + Red Edge)',
+        'interpretation': {
+            'high': '>0.6: Excellent vegetation health',
+            'medium': '0.3-0.6: Good vegetation condition',
+            'low': '<0.3: Stressed or sparse vegetation'
+        },
+        'significance': 'More sensitive to chlorophyll content and early stress detection'
+    }
+}
+
 @predictions_bp.route('/upload-data', methods=['POST'])
 @jwt_required()
 def upload_data():
@@ -54,26 +117,28 @@ def upload_data():
             except ValueError:
                 return jsonify({'error': 'Invalid field_id'}), 400
         
-        # Save the uploaded file
+        if file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'File type not allowed'}), 400
+        
+        # Parse straight from the request stream; only files that parse and
+        # validate are written to disk for a later prediction
+        processed_data, process_error = process_uploaded_stream(file.stream, file.filename)
+        if process_error:
+            return jsonify({'error': f'Processing error: {process_error}'}), 400
+        
+        is_valid, validation_message = validate_processed_data(processed_data)
+        if not is_valid:
+            return jsonify({'error': f'Validation error: {validation_message}'}), 400
+        
         filepath, error = save_uploaded_file(file)
         if error:
             return jsonify({'error': error}), 400
         
         try:
-            # Process the uploaded data
-            processed_data, process_error = process_uploaded_data(filepath)
-            if process_error:
-                cleanup_file(filepath)
-                return jsonify({'error': f'Processing error: {process_error}'}), 400
-            
-            # Validate processed data
-            is_valid, validation_message = validate_processed_data(processed_data)
-            if not is_valid:
-                cleanup_file(filepath)
-                return jsonify({'error': f'Validation error: {validation_message}'}), 400
-            
             # Calculate comprehensive spectral analysis
-            spectral_analysis = generate_comprehensive_spectral_analysis(processed_data.get('data', {}))
+            spectral_analysis = run_spectral_analysis(processed_data.get('data', {}))
             
             response_data = {
                 'message': 'File processed successfully',
@@ -90,13 +155,16 @@ def upload_data():
             # In a production system, you might use Redis or database storage
             response_data['file_id'] = os.path.basename(filepath)
             
-            logger.info(f"Data uploaded successfully for user {user_id}, shape: {processed_data.get('shape')}")
+            logger.info("Data uploaded successfully for user %s, shape: %s", user_id, processed_data.get('shape'))
             return jsonify(response_data), 200
             
         except Exception as e:
             cleanup_file(filepath)
             raise e
     
+    except AnalysisBusyError as e:
+        logger.warning("Spectral analysis unavailable: %s", e)
+        return jsonify({'error': 'Spectral analysis is busy, please retry shortly'}), 503
     except Exception as e:
         logger.error(f"Upload data error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
@@ -169,28 +237,23 @@ def predict():
                 'columns': list(input_data.keys()) if isinstance(input_data, dict) else []
             }
             
-            # Create feature matrix from input data
-            import numpy as np
+            # Create feature matrix from input data, padding shorter columns
+            # with their last value
             if isinstance(input_data, dict):
-                features = []
-                for key in ['ndvi', 'temperature', 'humidity', 'soil_moisture', 'ph']:
-                    if key in input_data:
-                        values = input_data[key]
-                        if not isinstance(values, list):
-                            values = [values]
-                        features.append(values)
+                try:
+                    columns = [np.atleast_1d(np.asarray(input_data[key], dtype=np.float32))
+                               for key in FEATURE_KEYS if key in input_data]
+                except (TypeError, ValueError):
+                    return jsonify({'error': 'Feature values must be numeric'}), 400
                 
-                if features:
-                    # Ensure all feature arrays have the same length
-                    max_len = max(len(f) for f in features)
-                    padded_features = []
-                    for f in features:
-                        if len(f) < max_len:
-                            f.extend([f[-1]] * (max_len - len(f)))
-                        padded_features.append(f)
+                if columns:
+                    max_len = max(column.size for column in columns)
+                    features = np.empty((max_len, len(columns)), dtype=np.float32)
+                    for j, column in enumerate(columns):
+                        features[:, j] = np.pad(column.ravel(), (0, max_len - column.size), mode='edge')
                     
-                    processed_data['features'] = np.array(padded_features).T
-                    processed_data['shape'] = processed_data['features'].shape
+                    processed_data['features'] = features
+                    processed_data['shape'] = features.shape
         else:
             return jsonify({'error': 'Either file_id or data must be provided'}), 400
         
@@ -199,15 +262,14 @@ def predict():
         if not is_valid:
             return jsonify({'error': f'Validation error: {validation_message}'}), 400
         
-        # Get field coordinates for real satellite data
-        field_coords = FieldModel.get_field_by_id(field_id, user_id)
-        latitude = field_coords.get('latitude') if field_coords else None
-        longitude = field_coords.get('longitude') if field_coords else None
+        # Field coordinates for real satellite data
+        latitude = field.get('latitude')
+        longitude = field.get('longitude')
         
         # Run prediction with real satellite data if coordinates available
         if latitude is not None and longitude is not None:
-            logger.info(f"Using real satellite data for field {field_id} at ({latitude}, {longitude})")
-            prediction_result, pred_error = predict_crop_health(
+            logger.info("Using real satellite data for field %s at (%s, %s)", field_id, latitude, longitude)
+            prediction_result, pred_error = run_prediction(
                 features=processed_data['features'],
                 latitude=float(latitude),
                 longitude=float(longitude),
@@ -217,31 +279,31 @@ def predict():
             # Fall back to features-only prediction
             logger.info("Using features-only prediction (no coordinates available)")
             features = processed_data['features']
-            prediction_result, pred_error = predict_crop_health(features)
+            prediction_result, pred_error = run_prediction(features)
         
         if pred_error:
             return jsonify({'error': f'Prediction error: {pred_error}'}), 500
         
         # Determine NDVI source and avoid overwriting real NDVI
-        # Check if we used real satellite data by looking for coordinates usage and data sources
-        used_real_satellite_data = (
+        # Check if we used real satellite data by looking for coordinates usage and data sources.
+        # Geographic estimates also report data_sources, so no need to inspect its contents.
+        used_real_satellite_data = bool(
             latitude is not None and longitude is not None and
             prediction_result and (
-                prediction_result.get('data_sources') is not None or  # Has real data sources
-                prediction_result.get('coordinates') is not None or    # Has coordinates info
-                'Geographic estimation' in str(prediction_result.get('data_sources', {}))  # Used geographic estimation
+                prediction_result.get('data_sources') is not None or  # Has real or estimated data sources
+                prediction_result.get('coordinates') is not None       # Has coordinates info
             )
         )
         
         if used_real_satellite_data and prediction_result.get('ndvi_value') is not None:
             avg_ndvi = float(prediction_result['ndvi_value'])
             ndvi_status = "success"
-            logger.info(f"Keeping NDVI from real satellite data: {avg_ndvi:.3f}")
+            logger.info("Keeping NDVI from real satellite data: %.3f", avg_ndvi)
         else:
             # Fall back to calculating NDVI from provided data (bands or existing ndvi in payload)
             avg_ndvi, ndvi_status = calculate_ndvi_from_data(processed_data.get('data', {}))
             prediction_result['ndvi_value'] = avg_ndvi
-            logger.info(f"Using calculated NDVI from input data: {avg_ndvi:.3f}")
+            logger.info("Using calculated NDVI from input data: %.3f", avg_ndvi)
         
         # Interpret NDVI
         ndvi_interpretation = interpret_ndvi(avg_ndvi)
@@ -262,11 +324,14 @@ def predict():
             ndvi_value=prediction_result['ndvi_value'],
             confidence=prediction_result['confidence'],
             status=prediction_result['status'],
-            prediction_data=json.dumps(prediction_data)
+            prediction_data=prediction_data
         )
         
         if not saved_prediction:
             logger.warning("Failed to save prediction to database")
+        else:
+            # The field list carries each field's latest health score
+            invalidate_fields_cache(user_id)
         
         # Create alert if crop health is poor
         if prediction_result['status'] == 'Poor' or prediction_result['health_score'] < 30:
@@ -278,11 +343,11 @@ def predict():
                 message=alert_message,
                 severity='high'
             )
-            logger.info(f"Created poor health alert for field {field_id}")
+            logger.info("Created poor health alert for field %s", field_id)
         
         # Clean up temporary file if it was uploaded for this prediction
-        if file_id and os.path.exists(os.path.join('/app/uploads', file_id)):
-            cleanup_file(os.path.join('/app/uploads', file_id))
+        if file_id:
+            cleanup_file(filepath)
         
         # Prepare response
         response_data = {
@@ -297,13 +362,33 @@ def predict():
             'timestamp': datetime.utcnow().isoformat()
         }
         
-        logger.info(f"Prediction completed for user {user_id}, field {field_id}: {prediction_result['status']}")
+        logger.info("Prediction completed for user %s, field %s: %s", user_id, field_id, prediction_result['status'])
         return jsonify(response_data), 200
     
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def _naive_timestamp(value):
+    """created_at as a naive datetime; rows may hold datetimes or ISO strings"""
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    # fromisoformat only accepts a 'Z' suffix from Python 3.11
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+def _relative_times(timestamps):
+    """'N days/hours/minutes ago' labels for naive UTC timestamps, diffed in one NumPy pass"""
+    if not timestamps:
+        return []
+    elapsed = np.datetime64(datetime.utcnow(), 's') - np.array(timestamps, dtype='datetime64[s]')
+    days, seconds = np.divmod(elapsed.astype(np.int64), 86400)
+    return [
+        f"{d} days ago" if d > 0 else f"{s // 3600} hours ago" if s > 3600 else f"{s // 60} minutes ago"
+        for d, s in zip(days.tolist(), seconds.tolist())
+    ]
+
 @predictions_bp.route('/alerts', methods=['GET'])
 @jwt_required()
 def get_alerts():
@@ -317,23 +402,18 @@ def get_alerts():
         # Fetch alerts
         alerts = AlertModel.get_alerts_by_user(user_id, unread_only=unread_only)
         
-        # Add additional information to alerts
+        # Add relative time information
+        timed_alerts, timestamps = [], []
         for alert in alerts:
-            # Add relative time information
             created_at = alert.get('created_at')
             if created_at:
                 try:
-                    alert_time = datetime.fromisoformat(str(created_at).replace('Z', '+00:00'))
-                    time_diff = datetime.utcnow() - alert_time.replace(tzinfo=None)
-                    
-                    if time_diff.days > 0:
-                        alert['relative_time'] = f"{time_diff.days} days ago"
-                    elif time_diff.seconds > 3600:
-                        alert['relative_time'] = f"{time_diff.seconds // 3600} hours ago"
-                    else:
-                        alert['relative_time'] = f"{time_diff.seconds // 60} minutes ago"
+                    timestamps.append(_naive_timestamp(created_at))
+                    timed_alerts.append(alert)
                 except Exception:
                     alert['relative_time'] = 'Recently'
+        for alert, relative_time in zip(timed_alerts, _relative_times(timestamps)):
+            alert['relative_time'] = relative_time
         
         response_data = {
             'alerts': alerts,
@@ -341,7 +421,7 @@ def get_alerts():
             'unread_count': len([a for a in alerts if not a.get('is_read', True)])
         }
         
-        logger.info(f"Retrieved {len(alerts)} alerts for user {user_id}")
+        logger.info("Retrieved %s alerts for user %s", len(alerts), user_id)
         return jsonify(response_data), 200
     
     except Exception as e:
@@ -360,42 +440,37 @@ def get_prediction_history(field_id):
         if not field:
             return jsonify({'error': 'Field not found'}), 404
         
-        # Get predictions for the field
-        predictions = PredictionModel.get_predictions_by_field(field_id, user_id)
-        
-        # Process predictions for response
-        for prediction in predictions:
-            # Parse prediction_data if it exists
-            if prediction.get('prediction_data'):
-                try:
-                    # Check if it's already a dict or needs to be parsed
-                    if isinstance(prediction['prediction_data'], str):
-                        prediction['prediction_data'] = json.loads(prediction['prediction_data'])
-                    elif isinstance(prediction['prediction_data'], dict):
-                        # Already a dict, no need to parse
-                        pass
-                    else:
-                        # If it's neither string nor dict, set to None
-                        prediction['prediction_data'] = None
-                except (json.JSONDecodeError, TypeError):
-                    prediction['prediction_data'] = None
+        def generate():
+            # Predictions are serialized as they come off the cursor so large
+            # histories never sit in memory as a whole; total_count trails the list
+            yield '{"field": ' + current_app.json.dumps(field) + ', "predictions": ['
+            total_count = 0
+            try:
+                for prediction in PredictionModel.iter_predictions_by_field(field_id, user_id):
+                    # Format timestamps; datetimes from Postgres need no round trip through str
+                    created_at = prediction.get('created_at')
+                    if isinstance(created_at, datetime):
+                        prediction['created_at'] = created_at.isoformat()
+                    elif created_at:
+                        try:
+                            prediction['created_at'] = datetime.fromisoformat(created_at).isoformat()
+                        except (TypeError, ValueError):
+                            pass
+                
+                    yield (',' if total_count else '') + current_app.json.dumps(prediction)
+                    total_count += 1
             
-            # Format timestamps
-            created_at = prediction.get('created_at')
-            if created_at:
-                try:
-                    prediction['created_at'] = datetime.fromisoformat(str(created_at)).isoformat()
-                except Exception:
-                    pass
-        
-        response_data = {
-            'field': field,
-            'predictions': predictions,
-            'total_count': len(predictions)
-        }
+            except Exception as e:
+                # Headers are already sent, so the failure is reported in the body
+                # instead of closing the list as if it were complete
+                logger.error(f"Prediction history stream error: {e}")
+                yield '], "total_count": ' + str(total_count) + ', "error": "Prediction history incomplete"}'
+                return
+            
+            yield '], "total_count": ' + str(total_count) + '}'
+            logger.info("Retrieved %s predictions for field %s", total_count, field_id)
         
-        logger.info(f"Retrieved {len(predictions)} predictions for field {field_id}")
-        return jsonify(response_data), 200
+        return Response(stream_with_context(generate()), mimetype='application/json'), 200
     
     except Exception as e:
         logger.error(f"Get prediction history error: {e}")
@@ -457,9 +532,9 @@ def multi_spectral_analysis():
                                     real_ndvi = None
                                     
                                 if real_ndvi:
-                                    logger.info(f"🛰️ Using real satellite NDVI for multi-spectral analysis: {real_ndvi:.3f}")
+                                    logger.info("🛰️ Using real satellite NDVI for multi-spectral analysis: %.3f", real_ndvi)
             except Exception as e:
-                logger.warning(f"Could not fetch real satellite data for field {field_id}: {e}")
+                logger.warning("Could not fetch real satellite data for field %s: %s", field_id, e)
         
         # Fallback to provided data if real satellite data not available
         if not input_data:
@@ -470,16 +545,16 @@ def multi_spectral_analysis():
             else:
                 return jsonify({'error': 'No spectral_bands or data provided'}), 400
         
-        logger.info(f"Processing multi-spectral analysis with bands: {list(input_data.keys())}")
+        logger.info("Processing multi-spectral analysis with bands: %s", list(input_data.keys()))
         
         # Generate comprehensive spectral analysis with real NDVI if available
         if real_ndvi is not None:
             # Use real NDVI value in the input data
             if 'ndvi' not in input_data:
                 input_data['ndvi'] = [real_ndvi] * 100  # Create array with real NDVI
-            logger.info(f"Using real NDVI in multi-spectral analysis: {real_ndvi:.3f}")
+            logger.info("Using real NDVI in multi-spectral analysis: %.3f", real_ndvi)
         
-        spectral_analysis = generate_comprehensive_spectral_analysis(input_data)
+        spectral_analysis = run_spectral_analysis(input_data)
         
         # Extract key metrics for backward compatibility
         avg_ndvi = 0.5  # Default
@@ -495,10 +570,13 @@ def multi_spectral_analysis():
             'analysis_type': 'comprehensive_multi_spectral'
         })
         
-        logger.info(f"Multi-spectral analysis completed")
-        logger.info(f"Indices calculated: {spectral_analysis.get('summary', {}).get('indices_calculated', [])}")
+        logger.info("Multi-spectral analysis completed")
+        logger.info("Indices calculated: %s", spectral_analysis.get('summary', {}).get('indices_calculated', []))
         return jsonify(response_data), 200
     
+    except AnalysisBusyError as e:
+        logger.warning("Spectral analysis unavailable: %s", e)
+        return jsonify({'error': 'Spectral analysis is busy, please retry shortly'}), 503
     except Exception as e:
         logger.error(f"Multi-spectral analysis error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
@@ -519,7 +597,7 @@ def ndvi_analysis():
         avg_ndvi, ndvi_status = calculate_ndvi_from_data(input_data)
         
         # Generate comprehensive analysis but return NDVI-focused response
-        spectral_analysis = generate_comprehensive_spectral_analysis(input_data)
+        spectral_analysis = run_spectral_analysis(input_data)
         
         # Extract NDVI-specific data
         ndvi_interpretation = spectral_analysis.get('interpretations', {}).get('NDVI', interpret_ndvi(avg_ndvi))
@@ -534,13 +612,26 @@ def ndvi_analysis():
             'full_spectral_analysis_available': True  # Hint to frontend
         }
         
-        logger.info(f"NDVI analysis completed for user {user_id}, average NDVI: {avg_ndvi:.3f}")
+        logger.info("NDVI analysis completed for user %s, average NDVI: %.3f", user_id, avg_ndvi)
         return jsonify(response_data), 200
     
+    except AnalysisBusyError as e:
+        logger.warning("Spectral analysis unavailable: %s", e)
+        return jsonify({'error': 'Spectral analysis is busy, please retry shortly'}), 503
     except Exception as e:
         logger.error(f"NDVI analysis error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def _fetch_weather(latitude, longitude):
+    """Weather inputs for the hyperspectral analyzer"""
+    from utils.satellite_data import SatelliteDataProvider
+    weather_result = SatelliteDataProvider().get_weather_data(latitude, longitude)
+    return {
+        'temperature': weather_result.get('avg_temperature', 25),
+        'humidity': weather_result.get('avg_humidity', 60),
+        'pressure': weather_result.get('pressure', 1013)
+    }
+
 @predictions_bp.route('/hyperspectral-visualization', methods=['POST'])
 @jwt_required()
 def hyperspectral_visualization():
@@ -574,6 +665,10 @@ def hyperspectral_visualization():
         if latitude is None or longitude is None:
             return jsonify({'error': 'Field coordinates not available'}), 400
         
+        # Start the weather lookup now so it overlaps the satellite fetch below
+        weather_data = data.get('weather_data')
+        weather_future = None if weather_data else _io_pool.submit(_fetch_weather, latitude, longitude)
+        
         # Get spectral data - either from uploaded data or use real satellite data
         spectral_data = data.get('spectral_data')
         field_data = None
@@ -588,10 +683,10 @@ def hyperspectral_visualization():
                 # Use real NDVI if available from satellite data
                 if 'ndvi' in field_data and 'value' in field_data['ndvi']:
                     real_ndvi = field_data['ndvi']['value']
-                    logger.info(f"🛰️ Using real satellite NDVI for hyperspectral analysis: {real_ndvi:.3f}")
+                    logger.info("🛰️ Using real satellite NDVI for hyperspectral analysis: %.3f", real_ndvi)
                 elif 'calculated_indices' in field_data and 'ndvi' in field_data['calculated_indices']:
                     real_ndvi = field_data['calculated_indices']['ndvi']['mean']
-                    logger.info(f"📊 Using calculated NDVI from real bands: {real_ndvi:.3f}")
+                    logger.info("📊 Using calculated NDVI from real bands: %.3f", real_ndvi)
                 else:
                     real_ndvi = None
                     logger.warning("No NDVI found in real satellite data")
@@ -601,28 +696,21 @@ def hyperspectral_visualization():
                 field_data = get_comprehensive_field_data(latitude, longitude)
                 spectral_data = field_data.get('spectral_bands', {})
                 real_ndvi = field_data.get('ndvi', {}).get('value') if field_data else None
-                logger.info(f"⚠️ Using fallback satellite data: NDVI={real_ndvi if real_ndvi else 'N/A'}")
+                logger.info("⚠️ Using fallback satellite data: NDVI=%s", real_ndvi if real_ndvi else 'N/A')
         
         # Get weather data
-        weather_data = data.get('weather_data')
-        if not weather_data:
-            from utils.satellite_data import SatelliteDataProvider
-            provider = SatelliteDataProvider()
-            weather_result = provider.get_weather_data(latitude, longitude)
-            weather_data = {
-                'temperature': weather_result.get('avg_temperature', 25),
-                'humidity': weather_result.get('avg_humidity', 60),
-                'pressure': weather_result.get('pressure', 1013)
-            }
+        if weather_future is not None:
+            weather_data = weather_future.result()
         
         # Initialize hyperspectral analyzer
+        from utils.hyperspectral_analysis import HyperspectralAnalyzer
         analyzer = HyperspectralAnalyzer()
         
         # If we have real field data, pass the real NDVI to maintain consistency
         real_ndvi = None
         if field_data and 'ndvi' in field_data:
             real_ndvi = field_data['ndvi'].get('value')
-            logger.info(f"Passing real NDVI to hyperspectral analyzer: {real_ndvi:.3f}")
+            logger.info("Passing real NDVI to hyperspectral analyzer: %.3f", real_ndvi)
         
         # Generate comprehensive visualization
         visualization_result = analyzer.generate_field_visualization(
@@ -649,60 +737,9 @@ def hyperspectral_visualization():
         }
         
         # Add spectral indices explanations
-        visualization_result['spectral_explanations'] = {
-            'ndvi': {
-                'name': 'Normalized Difference Vegetation Index',
-                'formula': '(NIR - Red) / (NIR + Red)',
-                'interpretation': {
-                    'high': '0.6-0.9: Healthy vegetation',
-                    'medium': '0.3-0.5: Moderate growth/stress',
-                    'low': '<0.2: Poor vegetation/bare soil'
-                },
-                'significance': 'Primary indicator of plant health and biomass'
-            },
-            'ndwi': {
-                'name': 'Normalized Difference Water Index',
-                'formula': '(NIR - SWIR) / (NIR + SWIR)',
-                'interpretation': {
-                    'high': '>0.5: Good water availability',
-                    'medium': '0.2-0.5: Moderate water content',
-                    'low': '<0.2: Water stress/drought'
-                },
-                'significance': 'Indicates water content in soil and plants'
-            },
-            'ndsi': {
-                'name': 'Normalized Difference Soil Index',
-                'formula': '(SWIR - Green) / (SWIR + Green)',
-                'interpretation': {
-                    'high': '>0.4: Bare soil/degraded land',
-                    'medium': '0.2-0.4: Partially vegetated',
-                    'low': '<0.2: Well-covered vegetation'
-                },
-                'significance': 'Detects soil exposure and land degradation'
-            },
-            'mndwi': {
-                'name': 'Modified Normalized Difference Water Index',
-                'formula': '(Green - SWIR) / (Green + SWIR)',
-                'interpretation': {
-                    'positive': '>0: Water bodies/very wet areas',
-                    'near_zero': '~0: Mixed water-vegetation',
-                    'negative': '<0: Dry land/vegetation'
-                },
-                'significance': 'Enhanced water body detection and moisture mapping'
-            },
-            'red_edge_ndvi': {
-                'name': 'Red Edge NDVI',
-                'formula': '(NIR - Red Edge) / (NIR + Red Edge)',
-                'interpretation': {
-                    'high': '>0.6: Excellent vegetation health',
-                    'medium': '0.3-0.6: Good vegetation condition',
-                    'low': '<0.3: Stressed or sparse vegetation'
-                },
-                'significance': 'More sensitive to chlorophyll content and early stress detection'
-            }
-        }
+        visualization_result['spectral_explanations'] = SPECTRAL_EXPLANATIONS
         
-        logger.info(f"Hyperspectral visualization completed for user {user_id}, field {field_id}")
+        logger.info("Hyperspectral visualization completed for user %s, field %s", user_id, field_id)
         return jsonify(visualization_result), 200
     
     except Exception as e:
@@ -724,6 +761,7 @@ def field_health_assessment(field_id):
         # Get query parameters
         crop_type = request.args.get('crop_type', 'general')
         include_recommendations = request.args.get('include_recommendations', 'true').lower() == 'true'
+        force_refresh = request.args.get('force_refresh', 'false').lower() == 'true'
         
         latitude = field.get('latitude')
         longitude = field.get('longitude')
@@ -734,7 +772,7 @@ def field_health_assessment(field_id):
         # Get comprehensive field data
         from utils.satellite_data import get_comprehensive_field_data, SatelliteDataProvider
         
-        field_data = get_comprehensive_field_data(latitude, longitude)
+        field_data = get_comprehensive_field_data(latitude, longitude, force_refresh=force_refresh)
         
         # Prepare data for analysis
         spectral_data = field_data.get('spectral_bands', {})
@@ -745,6 +783,7 @@ def field_health_assessment(field_id):
         }
         
         # Initialize analyzer
+        from utils.hyperspectral_analysis import HyperspectralAnalyzer
         analyzer = HyperspectralAnalyzer()
         
         # Calculate spectral indices
@@ -785,7 +824,7 @@ def field_health_assessment(field_id):
             'data_quality': field_data.get('data_quality', {})
         }
         
-        logger.info(f"Field health assessment completed for user {user_id}, field {field_id}")
+        logger.info("Field health assessment completed for user %s, field %s", user_id, field_id)
         return jsonify(response_data), 200
     
     except Exception as e:
@@ -1,7 +1,8 @@
 import os
-import json
 import numpy as np
-import pandas as pd
+import orjson
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 import logging
 from werkzeug.utils import secure_filename
 from datetime import datetime
@@ -9,11 +10,29 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 ALLOWED_EXTENSIONS = {'csv', 'npz', 'json'}
+_ALLOWED_SUFFIXES = tuple(f".{ext}" for ext in ALLOWED_EXTENSIONS)
 UPLOAD_FOLDER = '/app/uploads'
 
+# Columns of the feature matrix, in order
+FEATURE_COLUMNS = ('ndvi', 'temperature', 'humidity', 'soil_moisture', 'ph')
+# Sensor readings need ~3 significant figures, so features are kept in single precision
+FEATURE_DTYPE = np.float32
+NUMERIC_DTYPES = (np.float32, np.float64, np.int32, np.int64)
+# Uniform ranges used to fill in features missing from an upload
+SYNTHETIC_RANGES = {
+    'ndvi': (0.2, 0.8),
+    'temperature': (15, 35),
+    'humidity': (30, 90),
+    'soil_moisture': (20, 80),
+    'ph': (5.5, 8.5)
+}
+_SYNTHETIC_LOW = np.array([SYNTHETIC_RANGES[col][0] for col in FEATURE_COLUMNS], dtype=FEATURE_DTYPE)
+_SYNTHETIC_SPAN = np.array([high - low for low, high in map(SYNTHETIC_RANGES.get, FEATURE_COLUMNS)], dtype=FEATURE_DTYPE)
+_rng = np.random.default_rng()
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith(_ALLOWED_SUFFIXES)
 
 def ensure_upload_folder():
     """Ensure upload folder exists"""
@@ -44,87 +63,114 @@ def save_uploaded_file(file):
         logger.error(f"Error saving file: {e}")
         return None, str(e)
 
-def process_csv_file(filepath):
-    """Process CSV file and extract relevant data"""
+def _synthetic_features(n_samples):
+    """Uniform random feature matrix with each column drawn from its SYNTHETIC_RANGES range"""
+    feature_matrix = _rng.random((n_samples, len(FEATURE_COLUMNS)), dtype=FEATURE_DTYPE)
+    feature_matrix *= _SYNTHETIC_SPAN
+    feature_matrix += _SYNTHETIC_LOW
+    return feature_matrix
+
+def _as_feature_dtype(array):
+    """Numeric arrays cast to FEATURE_DTYPE; anything else is left for the dtype checks below"""
+    return array.astype(FEATURE_DTYPE, copy=False) if array.dtype in NUMERIC_DTYPES else array
+
+def _stack_features(arrays):
+    """Write 1-D/2-D arrays side by side into one FEATURE_DTYPE matrix, cut to the shortest array"""
+    n_samples = min(arr.shape[0] for arr in arrays)
+    widths = [1 if arr.ndim == 1 else arr.shape[1] for arr in arrays]
+    feature_matrix = np.empty((n_samples, sum(widths)), dtype=FEATURE_DTYPE)
+    
+    col = 0
+    for arr, width in zip(arrays, widths):
+        feature_matrix[:, col:col + width] = arr[:n_samples].reshape(n_samples, width)
+        col += width
+    return feature_matrix
+
+def process_csv_file(source):
+    """Process CSV data from a file path or binary file object"""
     try:
-        df = pd.read_csv(filepath)
-        logger.info(f"CSV loaded with shape: {df.shape}")
+        # Arrow's multithreaded reader; expected columns are parsed straight to float32
+        convert_options = pa_csv.ConvertOptions(column_types={col: pa.float32() for col in FEATURE_COLUMNS})
+        table = pa_csv.read_csv(source, convert_options=convert_options)
+        logger.info(f"CSV loaded with shape: {table.shape}")
         
-        # Expected columns for crop data
-        expected_columns = ['ndvi', 'temperature', 'humidity', 'soil_moisture', 'ph']
+        column_names = [name.lower() for name in table.column_names]
         
         # Check if we have numeric data
-        numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+        numeric_columns = [i for i, field in enumerate(table.schema)
+                           if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)]
         
         if len(numeric_columns) == 0:
             return None, "No numeric data found in CSV"
         
-        # Use available numeric columns or create synthetic data
+        # Each feature is written into its column of one preallocated matrix
+        feature_matrix = np.empty((table.num_rows, len(FEATURE_COLUMNS)), dtype=FEATURE_DTYPE)
         processed_data = {}
+        missing = []
         
-        # Try to find NDVI data
-        ndvi_columns = [col for col in df.columns if 'ndvi' in col.lower()]
-        if ndvi_columns:
-            processed_data['ndvi'] = df[ndvi_columns[0]].values
-        elif len(numeric_columns) > 0:
-            # Use first numeric column as NDVI proxy
-            processed_data['ndvi'] = df[numeric_columns[0]].values
-        else:
-            # Generate synthetic NDVI data
-            processed_data['ndvi'] = np.random.uniform(0.2, 0.8, len(df))
-        
-        # Extract other features if available
-        for col in ['temperature', 'humidity', 'soil_moisture', 'ph']:
-            matching_cols = [c for c in df.columns if col.lower() in c.lower()]
+        for i, col in enumerate(FEATURE_COLUMNS):
+            matching_cols = [j for j, name in enumerate(column_names) if col in name]
             if matching_cols:
-                processed_data[col] = df[matching_cols[0]].values
-            elif col in numeric_columns:
-                processed_data[col] = df[col].values
+                source_col = matching_cols[0]
+            elif col == 'ndvi':
+                # Use first numeric column as NDVI proxy
+                source_col = numeric_columns[0]
+            else:
+                missing.append(i)
+                continue
+            feature_matrix[:, i] = table.column(source_col).to_numpy(zero_copy_only=False)
+            processed_data[col] = feature_matrix[:, i]
         
         # If we don't have enough features, create synthetic ones
-        for col in ['temperature', 'humidity', 'soil_moisture', 'ph']:
-            if col not in processed_data:
-                if col == 'temperature':
-                    processed_data[col] = np.random.uniform(15, 35, len(df))
-                elif col == 'humidity':
-                    processed_data[col] = np.random.uniform(30, 90, len(df))
-                elif col == 'soil_moisture':
-                    processed_data[col] = np.random.uniform(20, 80, len(df))
-                elif col == 'ph':
-                    processed_data[col] = np.random.uniform(5.5, 8.5, len(df))
-        
-        # Create feature matrix
-        features = []
-        for col in ['ndvi', 'temperature', 'humidity', 'soil_moisture', 'ph']:
-            if col in processed_data:
-                features.append(processed_data[col])
-        
-        feature_matrix = np.column_stack(features) if features else None
+        if missing:
+            feature_matrix[:, missing] = _synthetic_features(table.num_rows)[:, missing]
+        for i in missing:
+            processed_data[FEATURE_COLUMNS[i]] = feature_matrix[:, i]
         
         return {
             'data': processed_data,
             'features': feature_matrix,
-            'shape': feature_matrix.shape if feature_matrix is not None else (0, 0),
-            'columns': list(processed_data.keys()) if processed_data else []
+            'shape': feature_matrix.shape,
+            'columns': list(processed_data.keys())
         }, None
         
     except Exception as e:
         logger.error(f"Error processing CSV: {e}")
         return None, str(e)
 
-def process_npz_file(filepath):
-    """Process NPZ file and extract relevant data"""
+def _npz_member_ndim(npz, key):
+    """Dimensions of an NPZ array from its .npy header, or None if the header can't be read"""
     try:
-        data = np.load(filepath)
+        with npz.zip.open(f"{key}.npy") as member:
+            version = np.lib.format.read_magic(member)
+            if version == (1, 0):
+                shape = np.lib.format.read_array_header_1_0(member)[0]
+            elif version == (2, 0):
+                shape = np.lib.format.read_array_header_2_0(member)[0]
+            else:
+                return None
+        return len(shape)
+    except (KeyError, ValueError):
+        return None
+
+def process_npz_file(source):
+    """Process NPZ data from a file path or binary file object"""
+    try:
+        # NpzFile reads each member lazily, when it is indexed
+        data = np.load(source, allow_pickle=False)
         logger.info(f"NPZ loaded with keys: {list(data.keys())}")
         
         processed_data = {}
         
         # Try to find common array names
         for key in data.keys():
+            # Arrays the header says are 3D+ are never decompressed
+            ndim = _npz_member_ndim(data, key)
+            if ndim is not None and ndim > 2:
+                continue
             array = data[key]
             if array.ndim <= 2:  # Only process 1D or 2D arrays
-                processed_data[key] = array
+                processed_data[key] = _as_feature_dtype(array)
         
         # Extract features for model prediction
         feature_arrays = []
@@ -133,36 +179,22 @@ def process_npz_file(filepath):
         ndvi_keys = [k for k in processed_data.keys() if 'ndvi' in k.lower()]
         if ndvi_keys:
             ndvi_data = processed_data[ndvi_keys[0]]
-            if ndvi_data.ndim == 1:
-                feature_arrays.append(ndvi_data.reshape(-1, 1))
-            else:
-                feature_arrays.append(ndvi_data)
+            feature_arrays.append(ndvi_data)
         
         # Include other numeric arrays
         for key, array in processed_data.items():
-            if 'ndvi' not in key.lower() and array.dtype in [np.float32, np.float64, np.int32, np.int64]:
-                if array.ndim == 1:
-                    feature_arrays.append(array.reshape(-1, 1))
-                elif array.ndim == 2 and array.shape[1] <= 10:  # Reasonable feature count
+            if 'ndvi' not in key.lower() and array.dtype in NUMERIC_DTYPES:
+                if array.ndim == 1 or (array.ndim == 2 and array.shape[1] <= 10):  # Reasonable feature count
                     feature_arrays.append(array)
         
         # Combine features
         if feature_arrays:
-            # Ensure all arrays have same number of samples
-            min_samples = min(arr.shape[0] for arr in feature_arrays)
-            feature_arrays = [arr[:min_samples] for arr in feature_arrays]
-            feature_matrix = np.concatenate(feature_arrays, axis=1)
+            feature_matrix = _stack_features(feature_arrays)
         else:
             # Create synthetic features if no suitable data found
             sample_size = 100
-            feature_matrix = np.random.rand(sample_size, 5)  # 5 features: NDVI, temp, humidity, soil moisture, pH
-            processed_data = {
-                'ndvi': feature_matrix[:, 0],
-                'temperature': feature_matrix[:, 1] * 20 + 15,  # 15-35°C
-                'humidity': feature_matrix[:, 2] * 60 + 30,     # 30-90%
-                'soil_moisture': feature_matrix[:, 3] * 60 + 20, # 20-80%
-                'ph': feature_matrix[:, 4] * 3 + 5.5             # 5.5-8.5
-            }
+            feature_matrix = _synthetic_features(sample_size)  # 5 features: NDVI, temp, humidity, soil moisture, pH
+            processed_data = {col: feature_matrix[:, i] for i, col in enumerate(FEATURE_COLUMNS)}
         
         return {
             'data': processed_data,
@@ -175,11 +207,14 @@ def process_npz_file(filepath):
         logger.error(f"Error processing NPZ: {e}")
         return None, str(e)
 
-def process_json_file(filepath):
-    """Process JSON file and extract relevant data"""
+def process_json_file(source):
+    """Process JSON data from a file path or binary file object"""
     try:
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        if hasattr(source, 'read'):
+            data = orjson.loads(source.read())
+        else:
+            with open(source, 'rb') as f:
+                data = orjson.loads(f.read())
         
         logger.info(f"JSON loaded with keys: {list(data.keys()) if isinstance(data, dict) else 'List of items'}")
         
@@ -190,21 +225,24 @@ def process_json_file(filepath):
             # Dictionary format
             for key, value in data.items():
                 if isinstance(value, (list, np.ndarray)):
-                    processed_data[key] = np.array(value)
+                    processed_data[key] = _as_feature_dtype(np.array(value))
                 elif isinstance(value, (int, float)):
-                    processed_data[key] = np.array([value])
+                    processed_data[key] = _as_feature_dtype(np.array([value]))
         elif isinstance(data, list):
             # List of records format
             if data and isinstance(data[0], dict):
-                # Convert list of dicts to dict of lists
+                # Convert list of dicts to dict of arrays, filling each array straight from the records
                 keys = data[0].keys()
                 for key in keys:
-                    values = [record.get(key, 0) for record in data]
                     try:
-                        processed_data[key] = np.array([float(v) for v in values])
+                        values = np.fromiter((record.get(key, 0) for record in data),
+                                             dtype=FEATURE_DTYPE, count=len(data))
                     except (ValueError, TypeError):
                         # Skip non-numeric data
                         continue
+                    # fromiter reads null as NaN; such columns are skipped as non-numeric too
+                    if not np.isnan(values).any():
+                        processed_data[key] = values
         
         # Create feature matrix
         feature_arrays = []
@@ -213,29 +251,20 @@ def process_json_file(filepath):
         ndvi_keys = [k for k in processed_data.keys() if 'ndvi' in k.lower()]
         if ndvi_keys:
             ndvi_data = processed_data[ndvi_keys[0]]
-            feature_arrays.append(ndvi_data.reshape(-1, 1))
+            feature_arrays.append(ndvi_data.ravel())
         
         # Add other numeric features
         for key, array in processed_data.items():
-            if 'ndvi' not in key.lower() and array.dtype in [np.float32, np.float64, np.int32, np.int64]:
-                feature_arrays.append(array.reshape(-1, 1))
+            if 'ndvi' not in key.lower() and array.dtype in NUMERIC_DTYPES:
+                feature_arrays.append(array.ravel())
         
         if feature_arrays:
-            # Ensure all arrays have same length
-            min_samples = min(arr.shape[0] for arr in feature_arrays)
-            feature_arrays = [arr[:min_samples] for arr in feature_arrays]
-            feature_matrix = np.concatenate(feature_arrays, axis=1)
+            feature_matrix = _stack_features(feature_arrays)
         else:
             # Generate synthetic data if no suitable data found
             sample_size = 50
-            feature_matrix = np.random.rand(sample_size, 5)
-            processed_data = {
-                'ndvi': feature_matrix[:, 0],
-                'temperature': feature_matrix[:, 1] * 20 + 15,
-                'humidity': feature_matrix[:, 2] * 60 + 30,
-                'soil_moisture': feature_matrix[:, 3] * 60 + 20,
-                'ph': feature_matrix[:, 4] * 3 + 5.5
-            }
+            feature_matrix = _synthetic_features(sample_size)
+            processed_data = {col: feature_matrix[:, i] for i, col in enumerate(FEATURE_COLUMNS)}
         
         return {
             'data': processed_data,
@@ -248,28 +277,49 @@ def process_json_file(filepath):
         logger.error(f"Error processing JSON: {e}")
         return None, str(e)
 
+# Parser for each supported file extension
+_PROCESSORS = {
+    '.csv': process_csv_file,
+    '.npz': process_npz_file,
+    '.json': process_json_file
+}
+
+def _process_by_extension(source, filename):
+    """Dispatch to the parser for the filename's extension"""
+    _, ext = os.path.splitext(filename)
+    ext = ext.lower()
+    
+    processor = _PROCESSORS.get(ext)
+    if processor is None:
+        return None, f"Unsupported file type: {ext}"
+    return processor(source)
+
 def process_uploaded_data(filepath):
     """Process uploaded data file based on its extension"""
     try:
         if not os.path.exists(filepath):
             return None, "File not found"
         
-        _, ext = os.path.splitext(filepath)
-        ext = ext.lower()
-        
-        if ext == '.csv':
-            return process_csv_file(filepath)
-        elif ext == '.npz':
-            return process_npz_file(filepath)
-        elif ext == '.json':
-            return process_json_file(filepath)
-        else:
-            return None, f"Unsupported file type: {ext}"
+        return _process_by_extension(filepath, filepath)
     
     except Exception as e:
         logger.error(f"Error processing uploaded data: {e}")
         return None, str(e)
 
+def process_uploaded_stream(stream, filename):
+    """Process an upload straight from its request stream, before it is saved
+    
+    Werkzeug already spools large uploads to a temporary file, so the stream is
+    seekable; it is rewound afterwards so the file can still be saved.
+    """
+    try:
+        return _process_by_extension(stream, filename or '')
+    except Exception as e:
+        logger.error(f"Error processing uploaded data: {e}")
+        return None, str(e)
+    finally:
+        stream.seek(0)
+
 def validate_processed_data(processed_data):
     """Validate that processed data has required structure"""
     if not processed_data:
@@ -293,8 +343,9 @@ def validate_processed_data(processed_data):
 def cleanup_file(filepath):
     """Clean up uploaded file"""
     try:
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            logger.info(f"Cleaned up file: {filepath}")
+        os.remove(filepath)
+        logger.info(f"Cleaned up file: {filepath}")
+    except FileNotFoundError:
+        pass
     except Exception as e:
         logger.error(f"Error cleaning up file: {e}")
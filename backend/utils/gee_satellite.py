@@ -105,10 +105,11 @@ class GEESatelliteDataProvider:
                     return {'error': 'GEE initialization failed'}
             
             # Set default date range (last 30 days)
+            today = datetime.now()
             if not end_date:
-                end_date = datetime.now().strftime('%Y-%m-%d')
+                end_date = today.strftime('%Y-%m-%d')
             if not start_date:
-                start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+                start_date = (today - timedelta(days=30)).strftime('%Y-%m-%d')
             
             # Create point geometry
             point = ee.Geometry.Point([longitude, latitude])
@@ -210,10 +211,11 @@ class GEESatelliteDataProvider:
                     return {'error': 'GEE initialization failed'}
             
             # Set default date range (last 30 days)
+            today = datetime.now()
             if not end_date:
-                end_date = datetime.now().strftime('%Y-%m-%d')
+                end_date = today.strftime('%Y-%m-%d')
             if not start_date:
-                start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+                start_date = (today - timedelta(days=30)).strftime('%Y-%m-%d')
             
             # Create point geometry
             point = ee.Geometry.Point([longitude, latitude])
@@ -314,10 +316,11 @@ class GEESatelliteDataProvider:
                     return {'error': 'GEE initialization failed'}
             
             # Set default date range
+            today = datetime.now()
             if not end_date:
-                end_date = datetime.now().strftime('%Y-%m-%d')
+                end_date = today.strftime('%Y-%m-%d')
             if not start_date:
-                start_date = (datetime.now() - timedelta(days=60)).strftime('%Y-%m-%d')
+                start_date = (today - timedelta(days=60)).strftime('%Y-%m-%d')
             
             # Create point geometry
             point = ee.Geometry.Point([longitude, latitude])
@@ -32,6 +32,12 @@ def convert_for_json(obj):
 
 logger = logging.getLogger(__name__)
 
+def normalized_difference(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(a - b) / (a + b) in one masked divide, 0 where a + b is 0"""
+    total = a + b
+    out = np.zeros(np.shape(total), dtype=np.result_type(total, np.float64))
+    return np.divide(a - b, total, out=out, where=total != 0)
+
 class HyperspectralAnalyzer:
     """
     Advanced hyperspectral analysis for agricultural monitoring
@@ -156,22 +162,21 @@ class HyperspectralAnalyzer:
                 logger.info(f"Using real NDVI value: {real_ndvi:.3f} for hyperspectral analysis")
             else:
                 # Calculate NDVI from bands
-                ndvi = np.where((nir + red) != 0, (nir - red) / (nir + red), 0)
+                ndvi = normalized_difference(nir, red)
             
             # NDWI = (NIR - SWIR) / (NIR + SWIR) 
-            ndwi = np.where((nir + swir) != 0, (nir - swir) / (nir + swir), 0)
+            ndwi = normalized_difference(nir, swir)
             
             # MNDWI (Modified NDWI) = (Green - SWIR) / (Green + SWIR)
-            mndwi = np.where((green + swir) != 0, (green - swir) / (green + swir), 0)
+            mndwi = normalized_difference(green, swir)
             
             # NDSI = (SWIR - Green) / (SWIR + Green)
-            ndsi = np.where((swir + green) != 0, (swir - green) / (swir + green), 0)
+            ndsi = normalized_difference(swir, green)
             
             # Red Edge NDVI (approximation using available bands)
             # RE-NDVI ≈ (NIR - Red_edge) / (NIR + Red_edge)
             # Since we don't have red-edge, approximate with weighted NIR-Red
-            red_edge_ndvi = np.where((nir * 1.1 + red * 0.9) != 0, 
-                                   (nir * 1.1 - red * 0.9) / (nir * 1.1 + red * 0.9), 0)
+            red_edge_ndvi = normalized_difference(nir * 1.1, red * 0.9)
             
             # Calculate statistics for each index
             def get_stats(values):
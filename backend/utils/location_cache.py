@@ -0,0 +1,38 @@
+"""
+Short-lived cache for per-location satellite and environmental lookups
+"""
+
+import copy
+import threading
+from typing import Callable, Dict
+from cachetools import TTLCache
+
+# Coordinates are rounded to ~100m grid cells: satellite NDVI is no finer than
+# that, and weather and soil data are far coarser
+COORDINATE_PRECISION = 3
+
+class LocationCache:
+    """Thread-safe TTL cache of successful lookups keyed by rounded coordinates"""
+
+    def __init__(self, maxsize: int, ttl: int = 900):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, latitude: float, longitude: float,
+                     fetch: Callable[[float, float], Dict], force_refresh: bool = False) -> Dict:
+        """Return the cached result for this location, calling fetch on a miss
+
+        Only results with 'success' set are cached. Callers add keys to the
+        result, so each gets its own copy.
+        """
+        key = (round(float(latitude), COORDINATE_PRECISION), round(float(longitude), COORDINATE_PRECISION))
+        cached = None
+        if not force_refresh:
+            with self._lock:
+                cached = self._cache.get(key)
+        if cached is None:
+            cached = fetch(latitude, longitude)
+            if cached.get('success'):
+                with self._lock:
+                    self._cache[key] = cached
+        return copy.deepcopy(cached)
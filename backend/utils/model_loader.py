@@ -5,6 +5,7 @@ import joblib
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 import warnings
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 warnings.filterwarnings('ignore')
 
 # Import real satellite data and agricultural model
@@ -17,6 +18,12 @@ logger = logging.getLogger(__name__)
 loaded_model = None
 scaler = None
 
+# Inference runs on a small bounded pool so the number of concurrent predictions
+# is capped independently of how many requests a worker is serving
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', 2))
+INFERENCE_TIMEOUT = float(os.getenv('INFERENCE_TIMEOUT', 60))
+_inference_pool = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix='infer')
+
 def create_dummy_model():
     """Create a dummy model for demonstration purposes"""
     try:
@@ -412,6 +419,16 @@ def predict_crop_health(features=None, latitude=None, longitude=None, use_real_d
         logger.error(f"Prediction error: {e}")
         return None, str(e)
 
+def run_prediction(*args, **kwargs):
+    """Run predict_crop_health on the inference pool and wait for its result"""
+    future = _inference_pool.submit(predict_crop_health, *args, **kwargs)
+    try:
+        return future.result(timeout=INFERENCE_TIMEOUT)
+    except FuturesTimeoutError:
+        future.cancel()
+        logger.error(f"Prediction timed out after {INFERENCE_TIMEOUT}s")
+        return None, "Prediction timed out"
+
 def get_model_info():
     """Get information about the loaded model"""
     global loaded_model
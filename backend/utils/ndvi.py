@@ -1,5 +1,8 @@
+import os
+import threading
 import numpy as np
 import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from typing import Dict, List, Tuple, Optional
 import matplotlib
 matplotlib.use('Agg')  # Use non-GUI backend
@@ -11,6 +14,21 @@ from io import BytesIO
 
 logger = logging.getLogger(__name__)
 
+# Spectral analyses run on one dedicated thread: pyplot keeps global figure
+# state, so plots from concurrent requests must not interleave.
+# ANALYSIS_TIMEOUT counts from when an analysis starts, not from when it was
+# queued. A running analysis can't be cancelled, so one that hangs keeps the
+# thread busy; later requests then wait at most ANALYSIS_QUEUE_TIMEOUT to start
+# and are refused (503) once ANALYSIS_QUEUE_SIZE analyses are pending.
+ANALYSIS_TIMEOUT = float(os.getenv('ANALYSIS_TIMEOUT', 120))
+ANALYSIS_QUEUE_TIMEOUT = float(os.getenv('ANALYSIS_QUEUE_TIMEOUT', 60))
+ANALYSIS_QUEUE_SIZE = int(os.getenv('ANALYSIS_QUEUE_SIZE', 8))
+_analysis_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='spectral')
+_analysis_slots = threading.BoundedSemaphore(ANALYSIS_QUEUE_SIZE)
+
+class AnalysisBusyError(Exception):
+    """The spectral analysis queue is full or its thread is stuck on another request"""
+
 def calculate_ndvi(red_band: np.ndarray, nir_band: np.ndarray) -> np.ndarray:
     """
     Calculate NDVI (Normalized Difference Vegetation Index)
@@ -24,16 +42,17 @@ def calculate_ndvi(red_band: np.ndarray, nir_band: np.ndarray) -> np.ndarray:
         NDVI values array
     """
     try:
-        # Avoid division by zero
         denominator = nir_band + red_band
-        denominator = np.where(denominator == 0, 1e-10, denominator)
         
-        ndvi = (nir_band - red_band) / denominator
+        # Pixels with no reflectance in either band get NDVI 0 instead of a division by zero
+        ndvi = np.zeros(np.shape(denominator), dtype=np.result_type(denominator, np.float32))
+        np.divide(nir_band - red_band, denominator, out=ndvi, where=denominator != 0)
         
         # Clip NDVI values to valid range [-1, 1]
-        ndvi = np.clip(ndvi, -1, 1)
+        np.clip(ndvi, -1, 1, out=ndvi)
         
-        logger.info(f"Calculated NDVI for {len(ndvi)} pixels, range: {np.min(ndvi):.3f} to {np.max(ndvi):.3f}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Calculated NDVI for %d pixels, range: %.3f to %.3f", ndvi.size, np.min(ndvi), np.max(ndvi))
         return ndvi
         
     except Exception as e:
@@ -172,6 +191,30 @@ def calculate_all_indices(data: Dict) -> Dict:
         logger.error(f"Error calculating all indices: {e}")
         return {}
 
+# Status fields per index bucket, built once and shared by every interpretation.
+# Buckets are checked in order against the exact value; anything that matches
+# none of them (including NaN) falls in the last one.
+_NDWI_BUCKETS = (
+    (0.3, {'status': "High Water Content", 'description': "Strong water presence or very moist vegetation",
+           'water_score': 90, 'color': "#0077BE"}),  # Blue
+    (0.1, {'status': "Moderate Water Content", 'description': "Water bodies or moist vegetation",
+           'water_score': 70, 'color': "#4A9FDB"}),  # Light blue
+    (-0.1, {'status': "Low Water Content", 'description': "Slightly moist soil or sparse vegetation",
+            'water_score': 40, 'color': "#87CEEB"}),  # Sky blue
+    (float('-inf'), {'status': "No Water", 'description': "Dry vegetation, bare soil, or built-up areas",
+                     'water_score': 10, 'color': "#8B4513"}),  # Brown
+)
+_NDSI_BUCKETS = (
+    (0.4, {'status': "Snow/Ice Present", 'description': "Strong snow or ice cover",
+           'snow_score': 90, 'color': "#FFFFFF"}),  # White
+    (0.1, {'status': "Possible Snow/Ice", 'description': "Light snow cover or mixed snow-vegetation",
+           'snow_score': 60, 'color': "#F0F8FF"}),  # Alice blue
+    (-0.1, {'status': "No Snow", 'description': "Clear ground or sparse vegetation",
+            'snow_score': 20, 'color': "#90EE90"}),  # Light green
+    (float('-inf'), {'status': "Vegetation/Water", 'description': "Vegetation or water bodies (no snow)",
+                     'snow_score': 5, 'color': "#228B22"}),  # Forest green
+)
+
 def interpret_ndwi(ndwi_value: float) -> Dict:
     """
     Interpret NDWI value and provide water presence status
@@ -183,33 +226,10 @@ def interpret_ndwi(ndwi_value: float) -> Dict:
         Dictionary with interpretation results
     """
     try:
-        if ndwi_value > 0.3:
-            status = "High Water Content"
-            description = "Strong water presence or very moist vegetation"
-            water_score = 90
-            color = "#0077BE"  # Blue
-        elif ndwi_value > 0.1:
-            status = "Moderate Water Content"
-            description = "Water bodies or moist vegetation"
-            water_score = 70
-            color = "#4A9FDB"  # Light blue
-        elif ndwi_value > -0.1:
-            status = "Low Water Content"
-            description = "Slightly moist soil or sparse vegetation"
-            water_score = 40
-            color = "#87CEEB"  # Sky blue
-        else:
-            status = "No Water"
-            description = "Dry vegetation, bare soil, or built-up areas"
-            water_score = 10
-            color = "#8B4513"  # Brown
-        
+        fields = next((fields for lower, fields in _NDWI_BUCKETS if ndwi_value > lower), _NDWI_BUCKETS[-1][1])
         return {
             'ndwi_value': round(ndwi_value, 3),
-            'status': status,
-            'description': description,
-            'water_score': water_score,
-            'color': color,
+            **fields,
             'confidence': min(95, max(60, abs(ndwi_value) * 100))
         }
         
@@ -235,33 +255,10 @@ def interpret_ndsi(ndsi_value: float) -> Dict:
         Dictionary with interpretation results
     """
     try:
-        if ndsi_value > 0.4:
-            status = "Snow/Ice Present"
-            description = "Strong snow or ice cover"
-            snow_score = 90
-            color = "#FFFFFF"  # White
-        elif ndsi_value > 0.1:
-            status = "Possible Snow/Ice"
-            description = "Light snow cover or mixed snow-vegetation"
-            snow_score = 60
-            color = "#F0F8FF"  # Alice blue
-        elif ndsi_value > -0.1:
-            status = "No Snow"
-            description = "Clear ground or sparse vegetation"
-            snow_score = 20
-            color = "#90EE90"  # Light green
-        else:
-            status = "Vegetation/Water"
-            description = "Vegetation or water bodies (no snow)"
-            snow_score = 5
-            color = "#228B22"  # Forest green
-        
+        fields = next((fields for lower, fields in _NDSI_BUCKETS if ndsi_value > lower), _NDSI_BUCKETS[-1][1])
         return {
             'ndsi_value': round(ndsi_value, 3),
-            'status': status,
-            'description': description,
-            'snow_score': snow_score,
-            'color': color,
+            **fields,
             'confidence': min(95, max(60, abs(ndsi_value) * 100))
         }
         
@@ -304,8 +301,6 @@ def create_index_stack_analysis(indices: Dict) -> Dict:
         ndsi = ndsi[:min_length] if len(ndsi) > 0 else np.full(min_length, 0.0)
         
         # Land cover classification based on index combinations
-        land_cover = np.full(min_length, 0, dtype=int)  # 0: Unknown
-        
         # Classification logic:
         # 1: Water (high MNDWI or NDWI)
         # 2: Snow/Ice (high NDSI)
@@ -314,19 +309,19 @@ def create_index_stack_analysis(indices: Dict) -> Dict:
         # 5: Bare Soil/Rock (low NDVI, low NDWI, low NDSI)
         # 6: Urban/Built-up (very low NDVI, low NDWI)
         
-        for i in range(min_length):
-            if ndsi[i] > 0.4:  # Snow/Ice
-                land_cover[i] = 2
-            elif mndwi[i] > 0.3 or ndwi[i] > 0.3:  # Water
-                land_cover[i] = 1
-            elif ndvi[i] > 0.6:  # Dense vegetation
-                land_cover[i] = 3
-            elif ndvi[i] > 0.2:  # Sparse vegetation
-                land_cover[i] = 4
-            elif ndvi[i] < -0.1:  # Urban/built-up
-                land_cover[i] = 6
-            else:  # Bare soil/rock
-                land_cover[i] = 5
+        # Conditions in priority order (first match wins), evaluated over all
+        # pixels at once; anything unmatched (incl. NaN) is bare soil/rock
+        land_cover = np.select(
+            [
+                ndsi > 0.4,                        # Snow/Ice
+                (mndwi > 0.3) | (ndwi > 0.3),      # Water
+                ndvi > 0.6,                        # Dense vegetation
+                ndvi > 0.2,                        # Sparse vegetation
+                ndvi < -0.1,                       # Urban/built-up
+            ],
+            [2, 1, 3, 4, 6],
+            default=5
+        )
         
         # Calculate land cover percentages
         land_cover_counts = np.bincount(land_cover, minlength=7)
@@ -593,18 +588,20 @@ def calculate_ndvi_from_data(data: Dict) -> Tuple[float, str]:
     try:
         # Check if NDVI is already calculated
         if 'ndvi' in data:
-            ndvi_values = np.array(data['ndvi'])
-            avg_ndvi = float(np.mean(ndvi_values))
+            # No band math here, so the values are not narrowed to float32
+            ndvi_values = np.asarray(data['ndvi'], dtype=np.float64)
+            avg_ndvi = float(np.nanmean(ndvi_values))
             logger.info(f"Using existing NDVI data, average: {avg_ndvi:.3f}")
             return avg_ndvi, "success"
         
-        # Try to calculate from red and NIR bands
+        # Try to calculate from red and NIR bands, cast once to float32
         if 'red' in data and 'nir' in data:
-            red_band = np.array(data['red'])
-            nir_band = np.array(data['nir'])
+            red_band = np.asarray(data['red'], dtype=np.float32)
+            nir_band = np.asarray(data['nir'], dtype=np.float32)
             ndvi_values = calculate_ndvi(red_band, nir_band)
-            if len(ndvi_values) > 0:
-                avg_ndvi = float(np.mean(ndvi_values))
+            if ndvi_values.size > 0:
+                # Reduced in float64 so float32 rounding doesn't show up in the reported average
+                avg_ndvi = float(np.nanmean(ndvi_values, dtype=np.float64))
                 logger.info(f"Calculated NDVI from red/NIR bands, average: {avg_ndvi:.3f}")
                 return avg_ndvi, "success"
         
@@ -683,6 +680,21 @@ def estimate_ndvi_from_features(data: Dict) -> Tuple[float, str]:
         logger.error(f"Error estimating NDVI: {e}")
         return 0.5, f"error: {str(e)}"
 
+# NDVI buckets by exclusive upper bound, checked in order against the exact
+# value; anything that matches none of them (including NaN) is Excellent
+_NDVI_BUCKETS = (
+    (0, {'status': "Poor", 'description': "No vegetation or stressed vegetation",
+         'health_score': 0, 'color': "#FF4444"}),  # Red
+    (0.2, {'status': "Poor", 'description': "Sparse vegetation or bare soil",
+           'health_score': 20, 'color': "#FF6644"}),  # Orange-red
+    (0.4, {'status': "Moderate", 'description': "Moderate vegetation density",
+           'health_score': 50, 'color': "#FFAA44"}),  # Orange
+    (0.6, {'status': "Good", 'description': "Healthy vegetation",
+           'health_score': 75, 'color': "#88CC44"}),  # Yellow-green
+    (float('inf'), {'status': "Excellent", 'description': "Dense, very healthy vegetation",
+                    'health_score': 90, 'color': "#44AA44"}),  # Green
+)
+
 def interpret_ndvi(ndvi_value: float) -> Dict:
     """
     Interpret NDVI value and provide vegetation health status
@@ -694,39 +706,11 @@ def interpret_ndvi(ndvi_value: float) -> Dict:
         Dictionary with interpretation results
     """
     try:
-        if ndvi_value < 0:
-            status = "Poor"
-            description = "No vegetation or stressed vegetation"
-            health_score = 0
-            color = "#FF4444"  # Red
-        elif ndvi_value < 0.2:
-            status = "Poor"
-            description = "Sparse vegetation or bare soil"
-            health_score = 20
-            color = "#FF6644"  # Orange-red
-        elif ndvi_value < 0.4:
-            status = "Moderate"
-            description = "Moderate vegetation density"
-            health_score = 50
-            color = "#FFAA44"  # Orange
-        elif ndvi_value < 0.6:
-            status = "Good"
-            description = "Healthy vegetation"
-            health_score = 75
-            color = "#88CC44"  # Yellow-green
-        else:
-            status = "Excellent"
-            description = "Dense, very healthy vegetation"
-            health_score = 90
-            color = "#44AA44"  # Green
-        
+        fields = next((fields for upper, fields in _NDVI_BUCKETS if ndvi_value < upper), _NDVI_BUCKETS[-1][1])
         return {
             'ndvi_value': round(ndvi_value, 3),
-            'status': status,
-            'description': description,
-            'health_score': health_score,
-            'color': color,
-            'confidence': min(95, max(60, health_score))  # Confidence based on score
+            **fields,
+            'confidence': min(95, max(60, fields['health_score']))  # Confidence based on score
         }
         
     except Exception as e:
@@ -900,6 +884,31 @@ def generate_comprehensive_spectral_analysis(data: Dict) -> Dict:
         logger.error(f"Error generating comprehensive spectral analysis: {e}")
         return {'error': f'Failed to generate comprehensive analysis: {str(e)}'}
 
+def run_spectral_analysis(data: Dict) -> Dict:
+    """Run generate_comprehensive_spectral_analysis on the analysis thread and wait for its result
+    
+    Raises AnalysisBusyError when the queue is full or the analysis doesn't start in time.
+    """
+    if not _analysis_slots.acquire(blocking=False):
+        raise AnalysisBusyError("Spectral analysis queue is full")
+    
+    started = threading.Event()
+    def task():
+        started.set()
+        return generate_comprehensive_spectral_analysis(data)
+    
+    future = _analysis_pool.submit(task)
+    # Released whether the task finishes, fails or is cancelled while queued
+    future.add_done_callback(lambda _: _analysis_slots.release())
+    
+    if not started.wait(ANALYSIS_QUEUE_TIMEOUT) and future.cancel():
+        raise AnalysisBusyError(f"Spectral analysis did not start within {ANALYSIS_QUEUE_TIMEOUT}s")
+    try:
+        return future.result(timeout=ANALYSIS_TIMEOUT)
+    except FuturesTimeoutError:
+        logger.error(f"Spectral analysis timed out after {ANALYSIS_TIMEOUT}s")
+        return {'error': 'Spectral analysis timed out'}
+
 def validate_ndvi_data(ndvi_values: np.ndarray) -> Tuple[bool, str]:
     """
     Validate NDVI data for consistency and quality
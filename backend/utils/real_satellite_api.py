@@ -4,6 +4,7 @@ Integrates NASA MODIS, Landsat, and ESA Sentinel data for authentic NDVI/spectra
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import numpy as np
 import logging
 from datetime import datetime, timedelta
@@ -11,6 +12,8 @@ from typing import Dict, List, Tuple, Optional
 import json
 import time
 
+from .location_cache import LocationCache
+
 logger = logging.getLogger(__name__)
 
 class RealSatelliteDataProvider:
@@ -20,6 +23,10 @@ class RealSatelliteDataProvider:
     
     def __init__(self):
         self.session = requests.Session()
+        # Keep-alive connections are reused across requests and threads
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'User-Agent': 'Agricultural-Monitoring-System/1.0'
         })
@@ -398,8 +405,12 @@ class RealSatelliteDataProvider:
 # Global instance
 real_satellite_provider = RealSatelliteDataProvider()
 
+# NDVI doesn't change meaningfully within 15 minutes, so repeat queries for a
+# field skip the remote APIs
+_satellite_cache = LocationCache(maxsize=4096, ttl=900)
+
 def get_real_satellite_data(latitude: float, longitude: float) -> Dict:
     """
     Convenience function to get real satellite data
     """
-    return real_satellite_provider.get_comprehensive_real_data(latitude, longitude)
+    return _satellite_cache.get_or_fetch(latitude, longitude, real_satellite_provider.get_comprehensive_real_data)
@@ -13,6 +13,8 @@ import json
 from typing import Dict, List, Tuple, Optional
 import time
 
+from .location_cache import LocationCache
+
 logger = logging.getLogger(__name__)
 
 class SatelliteDataProvider:
@@ -234,8 +236,9 @@ class SatelliteDataProvider:
                 
                 # Historical weather (last 7 days)
                 hist_data = []
+                today = datetime.now()
                 for days_ago in range(1, 8):
-                    hist_date = (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m-%d')
+                    hist_date = (today - timedelta(days=days_ago)).strftime('%Y-%m-%d')
                     hist_url = "http://api.weatherapi.com/v1/history.json"
                     hist_params = {
                         'key': self.weather_api_key,
@@ -672,10 +675,24 @@ class SatelliteDataProvider:
         
         return spectral_bands
 
-def get_comprehensive_field_data(latitude: float, longitude: float) -> Dict:
+# Repeat assessments of a field within 15 minutes skip the NDVI, weather and
+# soil APIs
+_field_data_cache = LocationCache(maxsize=1024, ttl=900)
+
+def get_comprehensive_field_data(latitude: float, longitude: float, force_refresh: bool = False) -> Dict:
     """
     Main function to get all real satellite and environmental data for a field
+    
+    Args:
+        latitude: Field latitude
+        longitude: Field longitude
+        force_refresh: Skip the cache and fetch fresh data
     """
+    return _field_data_cache.get_or_fetch(latitude, longitude, _fetch_comprehensive_field_data,
+                                          force_refresh=force_refresh)
+
+def _fetch_comprehensive_field_data(latitude: float, longitude: float) -> Dict:
+    """Fetch NDVI, weather and soil data for a field from the remote providers"""
     logger.info(f"Fetching comprehensive real data for coordinates: {latitude}, {longitude}")
     
     provider = SatelliteDataProvider()